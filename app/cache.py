@@ -0,0 +1,158 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+def content_hash(data):
+    """
+    Stable hash of JSON-serialisable data (or a Pydantic model).
+    Keys are sorted so equal payloads hash the same regardless of order.
+    """
+    if hasattr(data, "model_dump"):
+        data = data.model_dump()
+    payload = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class _Call:
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls for the same key into one: the first caller
+    runs the function and the others block until they can share its result
+    (or its exception). Nothing is remembered once the call returns.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+        try:
+            call.value = fn()
+            return call.value
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class LRUCache:
+    """
+    Thread-safe bounded mapping that drops the least recently used entry.
+    With `ttl` (seconds) entries also expire that long after being set.
+    Hits, misses, evictions and expirations are counted for sizing.
+    Concurrent misses on one key in get_or_compute share a single compute().
+    """
+
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._flights = SingleFlight()
+
+    def _lookup(self, key):
+        # Caller holds the lock; returns the entry or None if missing or expired
+        entry = self._data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+            del self._data[key]
+            self.expirations += 1
+            return None
+        return entry
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value):
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """
+        Return the cached value for `key`, calling compute() and storing it on
+        a miss. Callers missing the same key at the same time wait for the
+        first one's compute() instead of running their own.
+        """
+        value = self.get(key)
+        if value is None:
+            value = self._flights.do(key, lambda: self._compute_and_set(key, compute))
+        return value
+
+    def _compute_and_set(self, key, compute):
+        # A flight that just finished may have stored the value already
+        with self._lock:
+            entry = self._lookup(key)
+        if entry is not None:
+            return entry[0]
+        value = compute()
+        self.set(key, value)
+        return value
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._data.pop(key, None)
+            return default if entry is None else entry[0]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "coalesced": self._flights.coalesced,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def __len__(self):
+        return len(self._data)
@@ -0,0 +1,161 @@
+"""
+Bulk transcript export: render a whole batch or department into one ZIP.
+
+    python -m app.export.bulk --batch "Batch 20" --format pdf --output batch20.zip
+"""
+import argparse
+import multiprocessing
+import os
+import re
+import threading
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Render processes shared by all cohort exports of one API worker
+API_WORKERS = int(os.environ.get("SGPA_BULK_EXPORT_WORKERS", 2))
+
+_api_pool = None
+_api_pool_lock = threading.Lock()
+
+
+def _member_name(transcript, fmt):
+    reg_number = transcript["student"]["registration_number"]
+    return f"{re.sub(r'[^A-Za-z0-9_.-]', '_', reg_number)}.{fmt}"
+
+
+def render_member(fmt, transcript):
+    """Render one transcript in a worker process; returns (zip member name, bytes)"""
+    from app.export.render import RENDERERS
+
+    return _member_name(transcript, fmt), RENDERERS[fmt](transcript)
+
+
+def _bounded_map(pool, fn, fmt, items, window):
+    """
+    Like pool.map but keeps at most `window` tasks in flight, so the
+    input generator is only consumed as fast as results are written out.
+    """
+    pending = deque()
+    try:
+        for item in items:
+            pending.append(pool.submit(fn, fmt, item))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        # Drop queued work when the consumer stops early, e.g. a client disconnect
+        for future in pending:
+            future.cancel()
+
+
+def render_archive(transcripts, fmt, out, workers=None, window=None, pool=None):
+    """
+    Render `transcripts` on a process pool into a ZIP written to the file object `out`.
+    `out` does not need to be seekable. This is a generator that yields after
+    each member is written; the archive is complete once it is exhausted.
+    Pass `pool` to render on an existing pool of `workers` processes instead
+    of starting one for this archive.
+    """
+    workers = workers or os.cpu_count() or 1
+    window = window or workers * 4
+    with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        if pool is None:
+            with ProcessPoolExecutor(max_workers=workers) as own_pool:
+                yield from _write_members(archive, own_pool, fmt, transcripts, window)
+        else:
+            yield from _write_members(archive, pool, fmt, transcripts, window)
+
+
+def _write_members(archive, pool, fmt, transcripts, window):
+    for name, data in _bounded_map(pool, render_member, fmt, transcripts, window):
+        archive.writestr(name, data)
+        yield
+
+
+def api_pool():
+    """
+    The render pool of this API worker, started on first use. Its processes
+    are spawned rather than forked, since the worker runs threads.
+    """
+    global _api_pool
+    with _api_pool_lock:
+        if _api_pool is None:
+            _api_pool = ProcessPoolExecutor(
+                max_workers=API_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _api_pool
+
+
+def _discard_api_pool(pool):
+    global _api_pool
+    with _api_pool_lock:
+        if _api_pool is pool:
+            _api_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+class _StreamBuffer:
+    """Write-only file object whose contents are drained after each member"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_archive(transcripts, fmt):
+    """
+    Yield a ZIP of rendered transcripts chunk by chunk, for a streaming
+    response. Renders on the worker's shared pool (see api_pool), so
+    concurrent exports queue for the same SGPA_BULK_EXPORT_WORKERS processes.
+    """
+    pool = api_pool()
+    buffer = _StreamBuffer()
+    try:
+        for _ in render_archive(transcripts, fmt, buffer, workers=API_WORKERS, pool=pool):
+            chunk = buffer.drain()
+            if chunk:
+                yield chunk
+    except BrokenProcessPool:
+        # A render process died; the next export starts a fresh pool
+        _discard_api_pool(pool)
+        raise
+    chunk = buffer.drain()
+    if chunk:
+        yield chunk
+
+
+def main():
+    from database.operations import iter_transcripts
+
+    parser = argparse.ArgumentParser(description="Export transcripts of a batch or department as a ZIP")
+    parser.add_argument("--batch")
+    parser.add_argument("--department")
+    parser.add_argument("--format", choices=["pdf", "xlsx"], default="pdf")
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args()
+
+    count = 0
+    with open(args.output, "wb") as out:
+        transcripts = iter_transcripts(batch=args.batch, department=args.department)
+        for _ in render_archive(transcripts, args.format, out, workers=args.workers):
+            count += 1
+    print(f"Exported {count} transcripts to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+import os
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from app.cache import content_hash
+
+EXPORT_DIR = os.environ.get(
+    "SGPA_EXPORT_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "exports"),
+)
+JOB_ID_PATTERN = re.compile(r"[0-9a-f]{64}\.(xlsx|pdf)")
+# A .pending marker older than this belongs to a render that died (e.g. its worker was recycled)
+PENDING_TIMEOUT = float(os.environ.get("SGPA_EXPORT_PENDING_TIMEOUT", 300))
+# Exports not requested for MAX_AGE seconds are deleted, then the least recently
+# requested ones until the directory is under MAX_BYTES; 0 turns either off
+MAX_AGE = float(os.environ.get("SGPA_EXPORT_MAX_AGE", 24 * 3600))
+MAX_BYTES = int(os.environ.get("SGPA_EXPORT_MAX_BYTES", 1024 ** 3))
+# Seconds between two prunes by the same process
+PRUNE_INTERVAL = 60
+MIME_TYPES = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "pdf": "application/pdf",
+}
+
+
+def render_to_file(fmt, transcript, path):
+    """
+    Render one export and move it into place atomically. A failure is
+    written to `<path>.error` so every API worker can report it.
+    Module-level so it can run in a process pool.
+    """
+    from app.export.render import RENDERERS
+
+    try:
+        data = RENDERERS[fmt](transcript)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except Exception as error:
+        with open(path + ".error", "w") as f:
+            f.write(str(error))
+        raise
+    finally:
+        _remove(path + ".pending")
+    return path
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class ExportJobs:
+    """
+    Renders Excel/PDF exports on a worker pool and stores them on disk under
+    a hash of their content, so the same transcript is only rendered once.
+    Job state lives next to the output as `.pending` and `.error` marker
+    files, so any API worker can report on a job another one started.
+    """
+
+    def __init__(self, directory=EXPORT_DIR, workers=None, use_processes=False,
+                 max_age=MAX_AGE, max_bytes=MAX_BYTES):
+        self.directory = directory
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self._pruned_at = 0.0
+        executor_cls = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        self._executor = executor_cls(max_workers=workers)
+        # Futures of jobs started by this process, for wait()
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def path(self, job_id):
+        if not JOB_ID_PATTERN.fullmatch(job_id):
+            raise ValueError(f"Invalid export job id: {job_id}")
+        job_hash, _, fmt = job_id.partition(".")
+        return os.path.join(self.directory, job_hash[:2], f"{job_hash}.{fmt}")
+
+    def _pending(self, path):
+        try:
+            return time.time() - os.path.getmtime(path + ".pending") < PENDING_TIMEOUT
+        except FileNotFoundError:
+            return False
+
+    def job_id(self, transcript, fmt):
+        if fmt not in MIME_TYPES:
+            raise ValueError(f"Unsupported export format: {fmt}")
+        return f"{content_hash(transcript)}.{fmt}"
+
+    def submit(self, transcript, fmt):
+        """Queue an export unless it already exists or is being rendered; returns its job id"""
+        job_id = self.job_id(transcript, fmt)
+        path = self.path(job_id)
+        self._maybe_prune()
+        with self._lock:
+            try:
+                # Requested again: keep it through age and size pruning
+                os.utime(path)
+                return job_id
+            except FileNotFoundError:
+                pass
+            if self._pending(path):
+                return job_id
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Failed and abandoned renders are retried
+            _remove(path + ".error")
+            _remove(path + ".pending")
+            try:
+                # Exclusive create: of several workers submitting at once, one renders
+                os.close(os.open(path + ".pending", os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            except FileExistsError:
+                return job_id
+            self._futures[job_id] = self._executor.submit(render_to_file, fmt, transcript, path)
+        return job_id
+
+    def status(self, job_id):
+        """One of done, pending, failed (with error) or missing"""
+        path = self.path(job_id)
+        with self._lock:
+            future = self._futures.get(job_id)
+            if future is not None and future.done():
+                self._futures.pop(job_id)
+        if os.path.exists(path):
+            return {"job_id": job_id, "status": "done"}
+        if self._pending(path):
+            return {"job_id": job_id, "status": "pending"}
+        try:
+            with open(path + ".error") as f:
+                return {"job_id": job_id, "status": "failed", "error": f.read()}
+        except FileNotFoundError:
+            return {"job_id": job_id, "status": "missing"}
+
+    def wait(self, job_id, timeout=None):
+        """Wait for a job started by this process"""
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is not None:
+            future.result(timeout=timeout)
+        return self.status(job_id)
+
+    def _maybe_prune(self):
+        now = time.time()
+        with self._lock:
+            if now - self._pruned_at < PRUNE_INTERVAL:
+                return
+            self._pruned_at = now
+        self.prune()
+
+    def prune(self):
+        """
+        Delete exports older than `max_age`, then the least recently
+        requested ones until the directory holds at most `max_bytes`.
+        Renders in progress are left alone. Returns the number of files removed.
+        """
+        now = time.time()
+        entries = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                if name.endswith((".pending", ".part")) and now - stat.st_mtime < PENDING_TIMEOUT:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+
+        removed = 0
+        total = sum(size for _, size, _ in entries)
+        for mtime, size, path in entries:
+            expired = self.max_age and now - mtime > self.max_age
+            if not expired and (not self.max_bytes or total <= self.max_bytes):
+                break
+            _remove(path)
+            total -= size
+            removed += 1
+        return removed
+
+    def read(self, job_id):
+        with open(self.path(job_id), "rb") as f:
+            return f.read()
+
+
+export_jobs = ExportJobs(
+    workers=int(os.environ.get("SGPA_EXPORT_WORKERS", 2)),
+    use_processes=os.environ.get("SGPA_EXPORT_EXECUTOR", "thread") == "process",
+)
@@ -0,0 +1,158 @@
+import io
+import pandas as pd
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+from reportlab.lib.styles import getSampleStyleSheet
+from app.export.transcript import DEGREE
+
+
+def render_excel(transcript):
+    student = transcript["student"]
+    excel_data = []
+    # Add student information
+    for label, value in (
+        ("Name", student["name"]),
+        ("Registration Number", student["registration_number"]),
+        ("Degree", DEGREE),
+        ("Department", student["department"]),
+        ("Batch", student["batch"]),
+    ):
+        excel_data.append({
+            "Semester": "Student Information",
+            "Module Code": label,
+            "Module Title": value,
+            "Grade": "-",
+            "Credits": "-",
+            "Is GPA Module": False
+        })
+
+    # Add module data
+    for semester in transcript["semesters"]:
+        for module in semester["modules"]:
+            excel_data.append({
+                "Semester": semester["name"],
+                "Module Code": module["code"],
+                "Module Title": module["title"],
+                "Grade": module["grade"],
+                "Credits": module["credits"],
+                "Is GPA Module": module["is_gpa"]
+            })
+
+    # Add semester GPAs
+    for sem_gpa in transcript["semester_results"]:
+        excel_data.append({
+            "Semester": sem_gpa["semester"],
+            "Module Code": "SGPA",
+            "Module Title": f"Semester GPA: {sem_gpa['sgpa']}",
+            "Grade": "-",
+            "Credits": sem_gpa["credits"],
+            "Is GPA Module": True
+        })
+
+    # Add final SGPA
+    if transcript["final_sgpa"] is not None:
+        excel_data.append({
+            "Semester": "Final Results",
+            "Module Code": "Final SGPA",
+            "Module Title": f"Final SGPA: {transcript['final_sgpa']}",
+            "Grade": "-",
+            "Credits": "-",
+            "Is GPA Module": True
+        })
+        excel_data.append({
+            "Semester": "Final Results",
+            "Module Code": "Academic Standing",
+            "Module Title": transcript["standing"],
+            "Grade": "-",
+            "Credits": "-",
+            "Is GPA Module": True
+        })
+
+    df = pd.DataFrame(excel_data)
+    excel_buffer = io.BytesIO()
+    with pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
+        df.to_excel(writer, sheet_name='SGPA Results', index=False)
+    return excel_buffer.getvalue()
+
+
+def render_pdf(transcript):
+    student = transcript["student"]
+    pdf_buffer = io.BytesIO()
+    doc = SimpleDocTemplate(pdf_buffer, pagesize=letter)
+    styles = getSampleStyleSheet()
+    elements = []
+
+    # Add university header
+    elements.append(Paragraph("University of Moratuwa", styles['Title']))
+    elements.append(Paragraph("Faculty of Business", styles['Title']))
+    elements.append(Spacer(1, 20))
+
+    # Add title
+    elements.append(Paragraph("SGPA Calculation Results", styles['Heading1']))
+    elements.append(Spacer(1, 20))
+
+    # Add student information
+    elements.append(Paragraph("Student Information", styles['Heading2']))
+    elements.append(Paragraph(f"Name: {student['name']}", styles['Normal']))
+    elements.append(Paragraph(f"Registration Number: {student['registration_number']}", styles['Normal']))
+    elements.append(Paragraph(f"Degree: {DEGREE}", styles['Normal']))
+    elements.append(Paragraph(f"Department: {student['department']}", styles['Normal']))
+    elements.append(Paragraph(f"Batch: {student['batch']}", styles['Normal']))
+    elements.append(Spacer(1, 20))
+
+    # Add summary
+    elements.append(Paragraph("Academic Summary", styles['Heading2']))
+    if transcript["final_sgpa"] is not None:
+        elements.append(Paragraph(f"Final SGPA: {transcript['final_sgpa']}", styles['Heading3']))
+        elements.append(Paragraph(f"Academic Standing: {transcript['standing']}", styles['Heading3']))
+    elements.append(Spacer(1, 20))
+
+    # Add semester-wise results
+    elements.append(Paragraph("Semester-wise Results", styles['Heading2']))
+    for sem_result in transcript["semester_results"]:
+        elements.append(Paragraph(f"{sem_result['semester']}: SGPA = {sem_result['sgpa']} (Credits: {sem_result['credits']})", styles['Normal']))
+    elements.append(Spacer(1, 20))
+
+    # Add detailed results table
+    elements.append(Paragraph("Detailed Module Results", styles['Heading2']))
+    table_data = [["Semester", "Module Code", "Module Title", "Grade", "Credits", "Is GPA Module"]]
+    for semester in transcript["semesters"]:
+        for module in semester["modules"]:
+            table_data.append([
+                semester["name"],
+                module["code"],
+                module["title"],
+                module["grade"],
+                str(module["credits"]),
+                "Yes" if module["is_gpa"] else "No"
+            ])
+
+    # Calculate table width based on page width
+    table_width = letter[0] - 40  # 20 points margin on each side
+    col_widths = [table_width * 0.15, table_width * 0.15, table_width * 0.3,
+                  table_width * 0.1, table_width * 0.1, table_width * 0.2]
+
+    table = Table(table_data, colWidths=col_widths)
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 1), (-1, -1), 10),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('WORDWRAP', (0, 0), (-1, -1), True)
+    ]))
+    elements.append(table)
+
+    # Build PDF
+    doc.build(elements)
+    return pdf_buffer.getvalue()
+
+
+RENDERERS = {"xlsx": render_excel, "pdf": render_pdf}
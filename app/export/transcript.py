@@ -0,0 +1,78 @@
+DEGREE = "Bachelor of Business Science"
+
+
+def is_filled(module):
+    return bool(module["code"] and module["title"] and module["grade"] != "Not Selected")
+
+
+def check_unique_codes(semesters):
+    """Raise ValueError when filled modules repeat a module code within a semester"""
+    seen = set()
+    duplicates = []
+    for semester in semesters:
+        for module in semester["modules"]:
+            if not is_filled(module):
+                continue
+            key = (semester["name"], module["code"])
+            if key in seen and key not in duplicates:
+                duplicates.append(key)
+            seen.add(key)
+    if duplicates:
+        raise ValueError("Duplicate module codes: " + ", ".join(f"{code} ({sem})" for sem, code in duplicates))
+
+
+def build_transcript(name, reg_number, department, batch, semesters, results):
+    """
+    Everything an export needs, as plain data. `results` is grade_transcript output.
+    """
+    return {
+        "student": {
+            "name": name,
+            "registration_number": reg_number,
+            "department": department,
+            "batch": batch,
+        },
+        "semesters": [
+            {"name": sem["name"], "modules": [dict(m) for m in sem["modules"] if is_filled(m)]}
+            for sem in semesters
+        ],
+        "semester_results": results["semesters"],
+        "final_sgpa": results["final_sgpa"],
+        "standing": results["standing"],
+    }
+
+
+def transcript_from_user_data(user_data):
+    """
+    Build an export transcript from get_user_data output
+    """
+    semesters = {}
+    semester_results = {}
+    for record in user_data["sgpa_records"]:
+        semesters.setdefault(record["semester"], []).append({
+            "code": record["module_code"],
+            "title": record["module_title"],
+            "grade": record["grade"],
+            "credits": record["credits"],
+            "is_gpa": record["is_gpa"],
+        })
+        if record["semester_sgpa"] is not None:
+            semester_results[record["semester"]] = {
+                "semester": record["semester"],
+                "sgpa": record["semester_sgpa"],
+                "credits": record["semester_credits"],
+            }
+    records = user_data["sgpa_records"]
+    user = user_data["user"]
+    return build_transcript(
+        user["name"],
+        user["registration_number"],
+        user["department"],
+        user["batch"],
+        [{"name": name, "modules": modules} for name, modules in semesters.items()],
+        {
+            "semesters": list(semester_results.values()),
+            "final_sgpa": records[0]["final_sgpa"] if records else None,
+            "standing": records[0]["academic_standing"] if records else None,
+        },
+    )
@@ -1,11 +1,4 @@
 import streamlit as st
-import requests
-import pandas as pd
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
-import io
 import json
 import os
 from datetime import datetime
@@ -13,14 +6,27 @@ import sys
 
 # Add the parent directory to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from database.operations import save_user_data, get_user_data
+# Only light modules load up front. Grading (NumPy), exports and the database
+# layer (SQLAlchemy) are imported on first use, so a session that never
+# calculates, exports or loads history does not pay for them
+from app.export.transcript import build_transcript, transcript_from_user_data, is_filled, check_unique_codes
 
-# Initialize session state variables
+SEMESTER_NAMES = [f"Semester {i+1}" for i in range(8)] + ["Internship"]
+GRADES = ["Not Selected", "A+", "A", "A-", "B+", "B", "B-", "C+", "C", "C-", "D", "I-we", "F"]
+
+# Grade, save and load through the API when it is configured, otherwise in-process
+API_URL = os.environ.get("SGPA_API_URL", "").rstrip("/")
+
+# Initialize session state variables; semester_data holds the saved form input
 if "semester_data" not in st.session_state:
     st.session_state.semester_data = [
-        {"name": f"Semester {i+1}", "modules": []} for i in range(8)
+        {"name": name, "modules": []} for name in SEMESTER_NAMES
     ]
 
+# Bumped when semester_data is replaced so the form widgets pick up the new values
+if "form_version" not in st.session_state:
+    st.session_state.form_version = 0
+
 if "name" not in st.session_state:
     st.session_state.name = ""
 
@@ -36,8 +42,6 @@ if "batch" not in st.session_state:
 st.set_page_config(page_title="SGPA Calculator", layout="wide")
 st.title("🎓 SGPA Calculator | University of Moratuwa - Faculty of Business")
 
-BASE_URL = "http://localhost:8000"  # FastAPI backend
-
 # Student Information Section
 st.sidebar.title("Student Information")
 student_name = st.sidebar.text_input("Full Name")
@@ -50,21 +54,21 @@ department = st.sidebar.selectbox(
 )
 batch = st.sidebar.text_input("Batch (e.g., Batch 20)")
 
-# Grade input UI per module
-def get_grade_point_input(sem_index, mod_index):
+# Grade input UI per module, prefilled from the saved module
+def get_grade_point_input(sem_index, mod_index, module):
+    key = f"{st.session_state.form_version}_{sem_index}_{mod_index}"
+    grade = module.get("grade", "Not Selected")
     st.write(f"**Module {mod_index + 1}**")
-    code = st.text_input("Module Code", key=f"code_{sem_index}_{mod_index}")
-    title = st.text_input("Module Title", key=f"title_{sem_index}_{mod_index}")
+    code = st.text_input("Module Code", value=module.get("code", ""), key=f"code_{key}")
+    title = st.text_input("Module Title", value=module.get("title", ""), key=f"title_{key}")
     grade = st.selectbox(
-        "Grade",
-        ["Not Selected", "A+", "A", "A-", "B+", "B", "B-", "C+", "C", "C-", "D", "I-we", "F"],
-        key=f"grade_{sem_index}_{mod_index}",
+        "Grade", GRADES, index=GRADES.index(grade) if grade in GRADES else 0, key=f"grade_{key}"
     )
     credits = st.number_input(
-        "Credits", 0.0, 6.0, step=0.5, key=f"cred_{sem_index}_{mod_index}"
+        "Credits", 0.0, 6.0, value=min(float(module.get("credits") or 0.0), 6.0), step=0.5, key=f"cred_{key}"
     )
     is_gpa = st.checkbox(
-        "Is GPA Module", value=True, key=f"gpa_{sem_index}_{mod_index}"
+        "Is GPA Module", value=bool(module.get("is_gpa", True)), key=f"gpa_{key}"
     )
     return {
         "code": code,
@@ -75,533 +79,335 @@ def get_grade_point_input(sem_index, mod_index):
     }
 
 
-st.sidebar.title("Settings")
-num_semesters = 8
-semesters = []
+# Only the active semester is rendered. Module widgets sit in a form so typing
+# does not rerun the script, and the fragment keeps module count changes and
+# form submits from rerunning the rest of the page. Form values only reach the
+# server on submit, so switching semester and calculating are submit buttons
+# of the form too: both save the semester being edited first.
+@st.fragment
+def semester_editor(sem_index):
+    semester = st.session_state.semester_data[sem_index]
+    saved = semester["modules"]
+    is_internship = semester["name"] == "Internship"
+    max_modules = 10 if is_internship else 20
+    module_count = st.number_input(
+        f"Number of Modules ({semester['name']})", 1, max_modules,
+        min(len(saved) or (1 if is_internship else 5), max_modules),
+        key=f"mod_count_{st.session_state.form_version}_{sem_index}"
+    )
+    with st.form(f"semester_form_{st.session_state.form_version}_{sem_index}"):
+        switch_to = None
+        for i, (col, name) in enumerate(zip(st.columns(len(SEMESTER_NAMES)), SEMESTER_NAMES)):
+            if col.form_submit_button(name, disabled=i == sem_index, type="primary" if i == sem_index else "secondary"):
+                switch_to = i
+        modules = [
+            get_grade_point_input(sem_index, i, saved[i] if i < len(saved) else {})
+            for i in range(int(module_count))
+        ]
+        save = st.form_submit_button(f"Save {semester['name']}")
+        calculate = st.form_submit_button("Calculate Final SGPA", type="primary")
+    if save or calculate or switch_to is not None:
+        semester["modules"] = modules
+    if switch_to is not None:
+        st.session_state.active_semester = switch_to
+        st.rerun()
+    if calculate:
+        # Handled by the full script run below the editor
+        st.session_state.calculate = True
+        st.rerun()
+    if save:
+        st.success(f"{semester['name']} saved")
 
-# Semester input blocks
-for s in range(num_semesters):
-    with st.expander(f"Semester {s + 1}", expanded=(s == 0)):
-        module_count = st.number_input(
-            f"Number of Modules (Semester {s + 1})", 1, 20, 5, key=f"mod_count_{s}"
-        )
-        modules = [get_grade_point_input(s, i) for i in range(int(module_count))]
-        semesters.append({"name": f"Semester {s + 1}", "modules": modules})
 
-# Internship
-with st.expander("Internship", expanded=False):
-    intern_module_count = st.number_input(
-        "Number of Internship Modules", 1, 10, 1, key="intern_mods"
-    )
-    intern_modules = [
-        get_grade_point_input(8, i) for i in range(int(intern_module_count))
-    ]
-    semesters.append({"name": "Internship", "modules": intern_modules})
+if "active_semester" not in st.session_state:
+    st.session_state.active_semester = 0
+
+st.caption("Switching semester or calculating saves the semester you are editing.")
+semester_editor(st.session_state.active_semester)
+
+# One keep-alive HTTP session shared by all reruns and users
+@st.cache_resource
+def api_session():
+    import requests
+    return requests.Session()
+
+class RateLimited(Exception):
+    """The API answered 429; args[0] is its Retry-After in seconds"""
+
+def api_request(method, path, **kwargs):
+    response = api_session().request(method, f"{API_URL}{path}", timeout=30, **kwargs)
+    if response.status_code == 429:
+        raise RateLimited(response.headers.get("Retry-After", "1"))
+    response.raise_for_status()
+    return response
+
+# The whole transcript is graded in one call; identical input is answered from cache
+@st.cache_data(max_entries=256, show_spinner=False)
+def grade(semesters, department, batch):
+    if API_URL:
+        return api_request(
+            "POST", "/transcript/", json=semesters, params={"department": department, "batch": batch}
+        ).json()
+    from app.grade.service import grade_transcript
+    from app.grade.schemes import get_scheme
+
+    return grade_transcript(semesters, get_scheme(department, batch))
+
+# Saves and loads go to the API's /students endpoints in API mode, so the
+# frontend needs no database access of its own there
+def save_student(name, reg_number, department, batch, semesters, results):
+    if API_URL:
+        import requests
+
+        try:
+            api_request("POST", "/students", json={
+                "name": name,
+                "registration_number": reg_number,
+                "department": department,
+                "batch": batch,
+                "semesters": semesters,
+            })
+            return True
+        except requests.RequestException:
+            return False
+    from database.operations import save_user_data
+
+    return save_user_data(name, reg_number, department, batch, semesters, results=results)
+
+def load_student(reg_number):
+    """get_user_data-shaped data of a student, None when there is none"""
+    if API_URL:
+        import requests
+        from urllib.parse import quote
+
+        try:
+            return api_request("GET", f"/students/{quote(reg_number, safe='')}").json()
+        except requests.HTTPError as e:
+            if e.response.status_code == 404:
+                return None
+            raise
+    from database.operations import get_user_data
+
+    return get_user_data(reg_number)
+
+# Export job ids are content hashes, so finished files are read once
+@st.cache_data(max_entries=64, show_spinner=False)
+def export_file(job_id):
+    if API_URL:
+        return api_request("GET", f"/exports/{job_id}/file").content
+    from app.export.jobs import export_jobs
+
+    return export_jobs.read(job_id)
+
+# In API mode exports are rendered by the API's /exports jobs. The job id it
+# returns is kept per transcript and format, so reruns only poll its status
+def export_key(transcript, fmt):
+    from app.cache import content_hash
+
+    return content_hash([transcript, fmt])
+
+def request_export(transcript, fmt, key_prefix):
+    if API_URL:
+        import requests
+
+        try:
+            job = api_request("POST", "/exports", json={
+                "format": fmt,
+                "student": {**transcript["student"], "semesters": transcript["semesters"]},
+            }).json()
+        except RateLimited as e:
+            st.session_state[f"{key_prefix}_export_message"] = f"The server is busy, please try again in {e.args[0]} seconds."
+            return
+        except requests.RequestException:
+            st.session_state[f"{key_prefix}_export_message"] = f"Error requesting the {fmt.upper()} export, please try again."
+            return
+        st.session_state.setdefault("export_job_ids", {})[export_key(transcript, fmt)] = job["job_id"]
+        return
+    from app.export.jobs import export_jobs
+
+    export_jobs.submit(transcript, fmt)
+
+def export_status(transcript, fmt):
+    """export_jobs.status-shaped status of the transcript's export"""
+    if API_URL:
+        import requests
+
+        job_id = st.session_state.get("export_job_ids", {}).get(export_key(transcript, fmt))
+        if job_id is None:
+            return {"job_id": None, "status": "missing"}
+        try:
+            return api_request("GET", f"/exports/{job_id}").json()
+        except requests.HTTPError as e:
+            # Pruned since it was requested
+            if e.response.status_code == 404:
+                return {"job_id": job_id, "status": "missing"}
+            raise
+    from app.export.jobs import export_jobs
+
+    return export_jobs.status(export_jobs.job_id(transcript, fmt))
+
+EXPORT_LABELS = {"xlsx": "📊 Download Excel", "pdf": "📄 Download PDF"}
+
+# Export buttons; a format is rendered only when asked for, on the export
+# worker pool, and stored on disk so later requests download it directly
+def export_buttons(transcript, container, key_prefix):
+    from app.export.jobs import MIME_TYPES
+
+    message = st.session_state.pop(f"{key_prefix}_export_message", None)
+    if message:
+        container.error(message)
+    columns = container.columns(2)
+    for col, fmt in zip(columns, ("xlsx", "pdf")):
+        with col:
+            try:
+                status = export_status(transcript, fmt)
+            except RateLimited as e:
+                st.caption(f"The server is busy, please try again in {e.args[0]} seconds.")
+                st.button("Refresh", key=f"{key_prefix}_{fmt}_refresh")
+                continue
+            if status["status"] == "done":
+                st.download_button(
+                    label=EXPORT_LABELS[fmt],
+                    data=export_file(status["job_id"]),
+                    file_name=f"sgpa_results.{fmt}",
+                    mime=MIME_TYPES[fmt],
+                    key=f"{key_prefix}_{fmt}_download"
+                )
+            elif status["status"] == "pending":
+                st.caption(f"⏳ Preparing {fmt.upper()}...")
+                st.button("Refresh", key=f"{key_prefix}_{fmt}_refresh")
+            else:
+                if status["status"] == "failed":
+                    st.error(f"Error generating {fmt.upper()}: {status['error']}")
+                st.button(
+                    f"Prepare {fmt.upper()}", key=f"{key_prefix}_{fmt}_prepare",
+                    on_click=request_export, args=(transcript, fmt, key_prefix)
+                )
 
 # Submit
-if st.button("Calculate Final SGPA"):
+if st.session_state.pop("calculate", False):
     # Validate student information
     if not all([student_name, reg_number, department, batch]):
         st.error("Please fill in all student information fields in the sidebar.")
     else:
         with st.spinner("Calculating..."):
             # Filter out empty semesters
-            filled_semesters = []
-            for semester in semesters:
-                has_data = False
-                for module in semester["modules"]:
-                    if module["code"] and module["title"] and module["grade"] != "Not Selected":
-                        has_data = True
-                        break
-                if has_data:
-                    filled_semesters.append(semester)
-            
-            # Calculate semester-wise GPAs
-            semester_gpas = []
-            for semester in filled_semesters:
-                response = requests.post(f"{BASE_URL}/sgpa/", json=semester)
-                if response.status_code == 200:
-                    sem_data = response.json()
-                    semester_gpas.append({
-                        "semester": semester["name"],
-                        "sgpa": sem_data["sgpa"],
-                        "credits": sem_data["credits"]
-                    })
+            filled_semesters = [
+                semester for semester in st.session_state.semester_data
+                if any(is_filled(module) for module in semester["modules"])
+            ]
             
-            # Calculate final SGPA
-            response = requests.post(f"{BASE_URL}/final-sgpa/", json=filled_semesters)
-            if response.status_code == 200:
-                data = response.json()
-                
-                # Display student information
-                st.subheader("Student Information")
-                st.write(f"**Name:** {student_name}")
-                st.write(f"**Registration Number:** {reg_number}")
-                st.write(f"**Department:** {department}")
-                st.write(f"**Batch:** {batch}")
-                
-                # Display semester-wise results
-                st.success(f"🎓 Final SGPA: {data['final_sgpa']}")
-                st.info(f"🏅 Academic Standing: {data['standing']}")
-                
-                # Display semester-wise GPAs
-                st.subheader("Semester-wise Results")
-                for sem_result in semester_gpas:
-                    st.write(f"📚 {sem_result['semester']}: SGPA = {sem_result['sgpa']} (Credits: {sem_result['credits']})")
-                
-                # Export options
-                st.subheader("📥 Export Results")
-                
-                # Create two columns for export buttons
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    # Create Excel file
-                    excel_data = []
-                    # Add student information
-                    excel_data.append({
-                        "Semester": "Student Information",
-                        "Module Code": "Name",
-                        "Module Title": student_name,
-                        "Grade": "-",
-                        "Credits": "-",
-                        "Is GPA Module": False
-                    })
-                    excel_data.append({
-                        "Semester": "Student Information",
-                        "Module Code": "Registration Number",
-                        "Module Title": reg_number,
-                        "Grade": "-",
-                        "Credits": "-",
-                        "Is GPA Module": False
-                    })
-                    excel_data.append({
-                        "Semester": "Student Information",
-                        "Module Code": "Degree",
-                        "Module Title": "Bachelor of Business Science",
-                        "Grade": "-",
-                        "Credits": "-",
-                        "Is GPA Module": False
-                    })
-                    excel_data.append({
-                        "Semester": "Student Information",
-                        "Module Code": "Department",
-                        "Module Title": department,
-                        "Grade": "-",
-                        "Credits": "-",
-                        "Is GPA Module": False
-                    })
-                    excel_data.append({
-                        "Semester": "Student Information",
-                        "Module Code": "Batch",
-                        "Module Title": batch,
-                        "Grade": "-",
-                        "Credits": "-",
-                        "Is GPA Module": False
-                    })
-                    
-                    # Add module data
-                    for semester in filled_semesters:
-                        for module in semester["modules"]:
-                            if module["code"] and module["title"] and module["grade"] != "Not Selected":
-                                excel_data.append({
-                                    "Semester": semester["name"],
-                                    "Module Code": module["code"],
-                                    "Module Title": module["title"],
-                                    "Grade": module["grade"],
-                                    "Credits": module["credits"],
-                                    "Is GPA Module": module["is_gpa"]
-                                })
-                    
-                    # Add semester GPAs
-                    for sem_gpa in semester_gpas:
-                        excel_data.append({
-                            "Semester": sem_gpa["semester"],
-                            "Module Code": "SGPA",
-                            "Module Title": f"Semester GPA: {sem_gpa['sgpa']}",
-                            "Grade": "-",
-                            "Credits": sem_gpa["credits"],
-                            "Is GPA Module": True
-                        })
-                    
-                    # Add final SGPA
-                    excel_data.append({
-                        "Semester": "Final Results",
-                        "Module Code": "Final SGPA",
-                        "Module Title": f"Final SGPA: {data['final_sgpa']}",
-                        "Grade": "-",
-                        "Credits": "-",
-                        "Is GPA Module": True
-                    })
-                    
-                    excel_data.append({
-                        "Semester": "Final Results",
-                        "Module Code": "Academic Standing",
-                        "Module Title": data["standing"],
-                        "Grade": "-",
-                        "Credits": "-",
-                        "Is GPA Module": True
-                    })
-                    
-                    df = pd.DataFrame(excel_data)
-                    
-                    # Create Excel file
-                    excel_buffer = io.BytesIO()
-                    with pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
-                        df.to_excel(writer, sheet_name='SGPA Results', index=False)
-                    excel_data = excel_buffer.getvalue()
-                    
-                    st.download_button(
-                        label="📊 Download Excel",
-                        data=excel_data,
-                        file_name="sgpa_results.xlsx",
-                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                        key="excel_download"
-                    )
-                
-                with col2:
-                    try:
-                        # Create PDF file
-                        pdf_buffer = io.BytesIO()
-                        doc = SimpleDocTemplate(pdf_buffer, pagesize=letter)
-                        styles = getSampleStyleSheet()
-                        elements = []
-                        
-                        # Add university header
-                        elements.append(Paragraph("University of Moratuwa", styles['Title']))
-                        elements.append(Paragraph("Faculty of Business", styles['Title']))
-                        elements.append(Spacer(1, 20))
-                        
-                        # Add title
-                        elements.append(Paragraph("SGPA Calculation Results", styles['Heading1']))
-                        elements.append(Spacer(1, 20))
-                        
-                        # Add student information
-                        elements.append(Paragraph("Student Information", styles['Heading2']))
-                        elements.append(Paragraph(f"Name: {student_name}", styles['Normal']))
-                        elements.append(Paragraph(f"Registration Number: {reg_number}", styles['Normal']))
-                        elements.append(Paragraph(f"Degree: Bachelor of Business Science", styles['Normal']))
-                        elements.append(Paragraph(f"Department: {department}", styles['Normal']))
-                        elements.append(Paragraph(f"Batch: {batch}", styles['Normal']))
-                        elements.append(Spacer(1, 20))
-                        
-                        # Add summary
-                        elements.append(Paragraph("Academic Summary", styles['Heading2']))
-                        elements.append(Paragraph(f"Final SGPA: {data['final_sgpa']}", styles['Heading3']))
-                        elements.append(Paragraph(f"Academic Standing: {data['standing']}", styles['Heading3']))
-                        elements.append(Spacer(1, 20))
-                        
-                        # Add semester-wise results
-                        elements.append(Paragraph("Semester-wise Results", styles['Heading2']))
-                        for sem_result in semester_gpas:
-                            elements.append(Paragraph(f"{sem_result['semester']}: SGPA = {sem_result['sgpa']} (Credits: {sem_result['credits']})", styles['Normal']))
-                        elements.append(Spacer(1, 20))
-                        
-                        # Add detailed results table
-                        elements.append(Paragraph("Detailed Module Results", styles['Heading2']))
-                        table_data = [["Semester", "Module Code", "Module Title", "Grade", "Credits", "Is GPA Module"]]
-                        for semester in filled_semesters:
-                            for module in semester["modules"]:
-                                if module["code"] and module["title"] and module["grade"] != "Not Selected":
-                                    table_data.append([
-                                        semester["name"],
-                                        module["code"],
-                                        module["title"],
-                                        module["grade"],
-                                        str(module["credits"]),
-                                        "Yes" if module["is_gpa"] else "No"
-                                    ])
-                        
-                        # Calculate table width based on page width
-                        table_width = letter[0] - 40  # 20 points margin on each side
-                        col_widths = [table_width * 0.15, table_width * 0.15, table_width * 0.3, 
-                                    table_width * 0.1, table_width * 0.1, table_width * 0.2]
-                        
-                        table = Table(table_data, colWidths=col_widths)
-                        table.setStyle(TableStyle([
-                            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                            ('FONTSIZE', (0, 0), (-1, 0), 12),
-                            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                            ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-                            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                            ('FONTSIZE', (0, 1), (-1, -1), 10),
-                            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                            ('WORDWRAP', (0, 0), (-1, -1), True)
-                        ]))
-                        elements.append(table)
-                        
-                        # Build PDF
-                        doc.build(elements)
-                        pdf_data = pdf_buffer.getvalue()
-                        
-                        st.download_button(
-                            label="📄 Download PDF",
-                            data=pdf_data,
-                            file_name="sgpa_results.pdf",
-                            mime="application/pdf",
-                            key="pdf_download"
-                        )
-                    except Exception as e:
-                        st.error(f"Error generating PDF: {str(e)}")
+            # Calculate semester-wise and final SGPA in one pass
+            try:
+                check_unique_codes(filled_semesters)
+                data = grade(filled_semesters, department, batch)
+            except ValueError as e:
+                data = None
+                st.error(f"{e}. Each module code can be used once per semester.")
+            except RateLimited as e:
+                data = None
+                st.error(f"The server is busy, please try again in {e.args[0]} seconds.")
+        if data is not None:
+            st.session_state.transcript = build_transcript(
+                student_name, reg_number, department, batch, filled_semesters, data
+            )
             
             # Save to database
-            if save_user_data(student_name, reg_number, department, batch, filled_semesters):
+            try:
+                saved = save_student(student_name, reg_number, department, batch, filled_semesters, data)
+            except RateLimited as e:
+                saved = None
+                st.error(f"The server is busy, data not saved. Please try again in {e.args[0]} seconds.")
+            if saved:
                 st.success("Data saved successfully!")
-            else:
+            elif saved is not None:
                 st.error("Error saving data to database")
 
+# Results stay on screen across reruns so finished exports can be fetched
+if "transcript" in st.session_state:
+    transcript = st.session_state.transcript
+    student = transcript["student"]
+    
+    # Display student information
+    st.subheader("Student Information")
+    st.write(f"**Name:** {student['name']}")
+    st.write(f"**Registration Number:** {student['registration_number']}")
+    st.write(f"**Department:** {student['department']}")
+    st.write(f"**Batch:** {student['batch']}")
+    
+    # Display final results
+    st.success(f"🎓 Final SGPA: {transcript['final_sgpa']}")
+    st.info(f"🏅 Academic Standing: {transcript['standing']}")
+    
+    # Display semester-wise GPAs
+    st.subheader("Semester-wise Results")
+    for sem_result in transcript["semester_results"]:
+        st.write(f"📚 {sem_result['semester']}: SGPA = {sem_result['sgpa']} (Credits: {sem_result['credits']})")
+    
+    # Export options
+    st.subheader("📥 Export Results")
+    export_buttons(transcript, st, "results")
+
+# Fill the form from the database; runs as a callback so the new values are in
+# session state before the form is drawn
+def load_previous_data():
+    try:
+        user_data = load_student(st.session_state.load_reg_number)
+    except RateLimited as e:
+        st.session_state.load_status = f"The server is busy, please try again in {e.args[0]} seconds."
+        return
+    except Exception:
+        st.session_state.load_status = "Error loading data, please try again."
+        return
+    if user_data:
+        # Update session state variables
+        st.session_state.name = user_data["user"]["name"]
+        st.session_state.reg_number = user_data["user"]["registration_number"]
+        st.session_state.department = user_data["user"]["department"]
+        st.session_state.batch = user_data["user"]["batch"]
+
+        # Replace semester data with the stored module records
+        semester_data = [{"name": name, "modules": []} for name in SEMESTER_NAMES]
+        by_name = {semester["name"]: semester for semester in semester_data}
+        for record in user_data["sgpa_records"]:
+            semester = by_name.get(record["semester"])
+            if semester is not None:
+                semester["modules"].append({
+                    "code": record["module_code"],
+                    "title": record["module_title"],
+                    "grade": record["grade"],
+                    "credits": record["credits"],
+                    "is_gpa": record["is_gpa"]
+                })
+        st.session_state.semester_data = semester_data
+        st.session_state.form_version += 1
+
+        st.session_state.loaded_transcript = transcript_from_user_data(user_data)
+        st.session_state.load_status = "loaded"
+    else:
+        st.session_state.pop("loaded_transcript", None)
+        st.session_state.load_status = "missing"
+
 # Add a new section to load previous data
 st.sidebar.markdown("---")
 st.sidebar.subheader("Load Previous Data")
-load_reg_number = st.sidebar.text_input("Enter Registration Number to Load")
-
-# Add a button to load data
-if st.sidebar.button("Load Data"):
-    with st.spinner("Loading data..."):
-        user_data = get_user_data(load_reg_number)
-        if user_data:
-            # Update session state variables
-            st.session_state.name = user_data["user"]["name"]
-            st.session_state.reg_number = user_data["user"]["registration_number"]
-            st.session_state.department = user_data["user"]["department"]
-            st.session_state.batch = user_data["user"]["batch"]
-            
-            # Reset semester data
-            st.session_state.semester_data = [
-                {"name": f"Semester {i+1}", "modules": []} for i in range(8)
-            ]
-            
-            # Load semester data
-            for record in user_data["sgpa_records"]:
-                semester_name = record["semester"]
-                if semester_name.startswith("Semester "):
-                    semester_idx = int(semester_name.split()[1]) - 1
-                    if 0 <= semester_idx < len(st.session_state.semester_data):
-                        st.session_state.semester_data[semester_idx]["modules"].append({
-                            "code": record["module_code"],
-                            "title": record["module_title"],
-                            "grade": record["grade"],
-                            "credits": record["credits"],
-                            "is_gpa": record["is_gpa"]
-                        })
-            
-            # Update the UI to reflect loaded data
-            student_name = st.session_state.name
-            reg_number = st.session_state.reg_number
-            department = st.session_state.department
-            batch = st.session_state.batch
-            
-            # Display loaded data
-            st.sidebar.success("Data loaded successfully!")
-            st.sidebar.write("**Loaded Student Information:**")
-            st.sidebar.write(f"Name: {student_name}")
-            st.sidebar.write(f"Registration Number: {reg_number}")
-            st.sidebar.write(f"Department: {department}")
-            st.sidebar.write(f"Batch: {batch}")
-
-            # Create two columns for export buttons
-            col1, col2 = st.sidebar.columns(2)
-            
-            with col1:
-                # Create Excel file
-                excel_data = []
-                # Add student information
-                excel_data.append({
-                    "Semester": "Student Information",
-                    "Module Code": "Name",
-                    "Module Title": student_name,
-                    "Grade": "-",
-                    "Credits": "-",
-                    "Is GPA Module": False
-                })
-                excel_data.append({
-                    "Semester": "Student Information",
-                    "Module Code": "Registration Number",
-                    "Module Title": reg_number,
-                    "Grade": "-",
-                    "Credits": "-",
-                    "Is GPA Module": False
-                })
-                excel_data.append({
-                    "Semester": "Student Information",
-                    "Module Code": "Degree",
-                    "Module Title": "Bachelor of Business Science",
-                    "Grade": "-",
-                    "Credits": "-",
-                    "Is GPA Module": False
-                })
-                excel_data.append({
-                    "Semester": "Student Information",
-                    "Module Code": "Department",
-                    "Module Title": department,
-                    "Grade": "-",
-                    "Credits": "-",
-                    "Is GPA Module": False
-                })
-                excel_data.append({
-                    "Semester": "Student Information",
-                    "Module Code": "Batch",
-                    "Module Title": batch,
-                    "Grade": "-",
-                    "Credits": "-",
-                    "Is GPA Module": False
-                })
-                
-                # Add module data
-                for record in user_data["sgpa_records"]:
-                    if record["module_code"] and record["module_title"] and record["grade"] != "Not Selected":
-                        excel_data.append({
-                            "Semester": record["semester"],
-                            "Module Code": record["module_code"],
-                            "Module Title": record["module_title"],
-                            "Grade": record["grade"],
-                            "Credits": record["credits"],
-                            "Is GPA Module": record["is_gpa"]
-                        })
-                        # Add semester SGPA if available
-                        if record["semester_sgpa"]:
-                            excel_data.append({
-                                "Semester": record["semester"],
-                                "Module Code": "SGPA",
-                                "Module Title": f"Semester GPA: {record['semester_sgpa']}",
-                                "Grade": "-",
-                                "Credits": record["semester_credits"],
-                                "Is GPA Module": True
-                            })
-                
-                # Add final SGPA if available
-                if user_data["sgpa_records"] and user_data["sgpa_records"][0]["final_sgpa"]:
-                    excel_data.append({
-                        "Semester": "Final Results",
-                        "Module Code": "Final SGPA",
-                        "Module Title": f"Final SGPA: {user_data['sgpa_records'][0]['final_sgpa']}",
-                        "Grade": "-",
-                        "Credits": "-",
-                        "Is GPA Module": True
-                    })
-                    excel_data.append({
-                        "Semester": "Final Results",
-                        "Module Code": "Academic Standing",
-                        "Module Title": user_data["sgpa_records"][0]["academic_standing"],
-                        "Grade": "-",
-                        "Credits": "-",
-                        "Is GPA Module": True
-                    })
-                
-                df = pd.DataFrame(excel_data)
-                
-                # Create Excel file
-                excel_buffer = io.BytesIO()
-                with pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
-                    df.to_excel(writer, sheet_name='SGPA Results', index=False)
-                excel_data = excel_buffer.getvalue()
-                
-                st.download_button(
-                    label="📊 Download Excel",
-                    data=excel_data,
-                    file_name="sgpa_results.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                    key="excel_download"
-                )
-            
-            with col2:
-                try:
-                    # Create PDF file
-                    pdf_buffer = io.BytesIO()
-                    doc = SimpleDocTemplate(pdf_buffer, pagesize=letter)
-                    styles = getSampleStyleSheet()
-                    elements = []
-                    
-                    # Add university header
-                    elements.append(Paragraph("University of Moratuwa", styles['Title']))
-                    elements.append(Paragraph("Faculty of Business", styles['Title']))
-                    elements.append(Spacer(1, 20))
-                    
-                    # Add title
-                    elements.append(Paragraph("SGPA Calculation Results", styles['Heading1']))
-                    elements.append(Spacer(1, 20))
-                    
-                    # Add student information
-                    elements.append(Paragraph("Student Information", styles['Heading2']))
-                    elements.append(Paragraph(f"Name: {student_name}", styles['Normal']))
-                    elements.append(Paragraph(f"Registration Number: {reg_number}", styles['Normal']))
-                    elements.append(Paragraph(f"Degree: Bachelor of Business Science", styles['Normal']))
-                    elements.append(Paragraph(f"Department: {department}", styles['Normal']))
-                    elements.append(Paragraph(f"Batch: {batch}", styles['Normal']))
-                    elements.append(Spacer(1, 20))
-                    
-                    # Add summary
-                    elements.append(Paragraph("Academic Summary", styles['Heading2']))
-                    if user_data["sgpa_records"] and user_data["sgpa_records"][0]["final_sgpa"]:
-                        elements.append(Paragraph(f"Final SGPA: {user_data['sgpa_records'][0]['final_sgpa']}", styles['Heading3']))
-                        elements.append(Paragraph(f"Academic Standing: {user_data['sgpa_records'][0]['academic_standing']}", styles['Heading3']))
-                    elements.append(Spacer(1, 20))
-                    
-                    # Add semester-wise results
-                    elements.append(Paragraph("Semester-wise Results", styles['Heading2']))
-                    for record in user_data["sgpa_records"]:
-                        if record["semester_sgpa"]:
-                            elements.append(Paragraph(f"{record['semester']}: SGPA = {record['semester_sgpa']} (Credits: {record['semester_credits']})", styles['Normal']))
-                    elements.append(Spacer(1, 20))
-                    
-                    # Add detailed results table
-                    elements.append(Paragraph("Detailed Module Results", styles['Heading2']))
-                    table_data = [["Semester", "Module Code", "Module Title", "Grade", "Credits", "Is GPA Module"]]
-                    for record in user_data["sgpa_records"]:
-                        if record["module_code"] and record["module_title"] and record["grade"] != "Not Selected":
-                            table_data.append([
-                                record["semester"],
-                                record["module_code"],
-                                record["module_title"],
-                                record["grade"],
-                                str(record["credits"]),
-                                "Yes" if record["is_gpa"] else "No"
-                            ])
-                    
-                    # Calculate table width based on page width
-                    table_width = letter[0] - 40  # 20 points margin on each side
-                    col_widths = [table_width * 0.15, table_width * 0.15, table_width * 0.3, 
-                                table_width * 0.1, table_width * 0.1, table_width * 0.2]
-                    
-                    table = Table(table_data, colWidths=col_widths)
-                    table.setStyle(TableStyle([
-                        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                        ('FONTSIZE', (0, 0), (-1, 0), 12),
-                        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                        ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-                        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                        ('FONTSIZE', (0, 1), (-1, -1), 10),
-                        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                        ('WORDWRAP', (0, 0), (-1, -1), True)
-                    ]))
-                    elements.append(table)
-                    
-                    # Build PDF
-                    doc.build(elements)
-                    pdf_data = pdf_buffer.getvalue()
-                    
-                    st.download_button(
-                        label="📄 Download PDF",
-                        data=pdf_data,
-                        file_name="sgpa_results.pdf",
-                        mime="application/pdf",
-                        key="pdf_download"
-                    )
-                except Exception as e:
-                    st.error(f"Error generating PDF: {str(e)}")
-            
-            # Update the form fields
-            st.session_state.student_name = student_name
-            st.session_state.reg_number = reg_number
-            st.session_state.department = department
-            st.session_state.batch = batch
-        else:
-            st.sidebar.error("No data found for this registration number")
+st.sidebar.text_input("Enter Registration Number to Load", key="load_reg_number")
+st.sidebar.button("Load Data", on_click=load_previous_data)
+
+load_status = st.session_state.pop("load_status", None)
+if load_status == "loaded":
+    st.sidebar.success("Data loaded successfully!")
+elif load_status == "missing":
+    st.sidebar.error("No data found for this registration number")
+elif load_status:
+    st.sidebar.error(load_status)
+
+# Display loaded data
+if "loaded_transcript" in st.session_state:
+    loaded = st.session_state.loaded_transcript["student"]
+    st.sidebar.write("**Loaded Student Information:**")
+    st.sidebar.write(f"Name: {loaded['name']}")
+    st.sidebar.write(f"Registration Number: {loaded['registration_number']}")
+    st.sidebar.write(f"Department: {loaded['department']}")
+    st.sidebar.write(f"Batch: {loaded['batch']}")
+    export_buttons(st.session_state.loaded_transcript, st.sidebar, "loaded")
@@ -0,0 +1,191 @@
+from itertools import groupby
+
+import numpy as np
+from app.grade.schemes import DEFAULT_SCHEME
+
+
+def _points_table(schemes):
+    """One points table for every scheme involved; returns ({scheme key: code offset}, table)"""
+    offsets = {}
+    tables = []
+    size = 0
+    for scheme in schemes:
+        if scheme.key not in offsets:
+            offsets[scheme.key] = size
+            tables.append(scheme.points)
+            size += len(scheme.points)
+    return offsets, (np.concatenate(tables) if tables else np.empty(0))
+
+
+def _credits_array(values):
+    """float32 when that is lossless (the UI's half-credit steps are), float64 otherwise"""
+    credits = np.fromiter(values, dtype=np.float64, count=len(values))
+    compact = credits.astype(np.float32)
+    return compact if np.array_equal(compact, credits) else credits
+
+
+def _round2(numerators, denominators):
+    """
+    round(n / d, 2) elementwise (0.0 where d is 0), matching Python's round.
+    np.rint on the scaled value agrees with it except within float error of
+    a .5 tie, so only those few are re-rounded in Python.
+    """
+    ratios = np.divide(numerators, denominators, out=np.zeros(len(numerators)), where=denominators != 0)
+    scaled = ratios * 100
+    rounded = np.rint(scaled) / 100
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    for i in np.flatnonzero(near_tie).tolist():
+        rounded[i] = round(float(ratios[i]), 2)
+    return rounded
+
+
+class ModuleArrays:
+    """
+    Struct-of-arrays form of many students' modules for batch scoring.
+    Each module costs a grade code (uint8), its credits (float32), a GPA flag
+    and a semester index instead of a Pydantic object.
+    """
+
+    __slots__ = ("grade_codes", "credits", "is_gpa", "semester_ids",
+                 "semester_names", "semester_owner", "schemes", "points_table")
+
+    def __init__(self, grade_codes, credits, is_gpa, semester_ids,
+                 semester_names, semester_owner, schemes, points_table):
+        self.grade_codes = grade_codes
+        self.credits = credits
+        self.is_gpa = is_gpa
+        self.semester_ids = semester_ids
+        self.semester_names = semester_names
+        self.semester_owner = semester_owner
+        self.schemes = schemes
+        self.points_table = points_table
+
+    @classmethod
+    def _build(cls, codes, credits, is_gpa, sem_ids, sem_names, sem_owner, schemes, points_table):
+        code_dtype = np.uint8 if len(points_table) <= 256 else np.uint16
+        return cls(
+            np.fromiter(codes, dtype=code_dtype, count=len(codes)),
+            _credits_array(credits),
+            np.fromiter(is_gpa, dtype=bool, count=len(is_gpa)),
+            np.asarray(sem_ids, dtype=np.int32),
+            sem_names,
+            np.asarray(sem_owner, dtype=np.int32),
+            schemes,
+            points_table,
+        )
+
+    @classmethod
+    def from_students(cls, students, schemes=None):
+        """
+        From a list of students, each a list of Semester models (or anything
+        with .name and .modules of .grade/.credits/.is_gpa). `schemes` is an
+        optional parallel list of grading schemes.
+        """
+        if schemes is None:
+            schemes = [DEFAULT_SCHEME] * len(students)
+        offsets, points_table = _points_table(schemes)
+
+        # One comprehension per field; per-module appends dominate otherwise
+        semesters = [sem for student in students for sem in student]
+        module_lists = [sem.modules for sem in semesters]
+        student_sizes = [len(student) for student in students]
+        sem_sizes = [len(modules) for modules in module_lists]
+
+        # Grade -> code in the shared points table, per scheme
+        lookups = {}
+        for scheme in schemes:
+            if scheme.key not in lookups:
+                offset = offsets[scheme.key]
+                lookups[scheme.key] = ({grade: offset + code for grade, code in scheme.codes.items()}.get,
+                                       offset + scheme.unknown_code)
+        codes = []
+        start = 0
+        for key, run in groupby(zip(student_sizes, schemes), key=lambda item: item[1].key):
+            lookup, unknown = lookups[key]
+            end = start + sum(n_sems for n_sems, _ in run)
+            codes.extend([lookup(m.grade, unknown) for modules in module_lists[start:end] for m in modules])
+            start = end
+        credits = [m.credits for modules in module_lists for m in modules]
+        is_gpa = [m.is_gpa for modules in module_lists for m in modules]
+        sem_ids = np.repeat(np.arange(len(semesters), dtype=np.int32), sem_sizes)
+        sem_names = [sem.name for sem in semesters]
+        sem_owner = np.repeat(np.arange(len(students), dtype=np.int32), student_sizes)
+        return cls._build(codes, credits, is_gpa, sem_ids, sem_names, sem_owner, schemes, points_table)
+
+    @classmethod
+    def from_rows(cls, rows, schemes=None):
+        """
+        From DB rows of (user_id, semester, grade, credits, is_gpa), grouped
+        by user. `schemes` maps user id to grading scheme (default otherwise).
+        Returns (arrays, user ids in student order).
+        """
+        schemes = schemes or {}
+        if not rows:
+            return cls._build([], [], [], [], [], [], [], np.empty(0)), []
+        row_users, row_semesters, grades, credits, is_gpa = zip(*rows)
+
+        students = {}
+        semesters = {}
+        sem_ids = []
+        sem_names, sem_owner = [], []
+        for user_id, semester in zip(row_users, row_semesters):
+            s_idx = students.setdefault(user_id, len(students))
+            sem_id = semesters.get((user_id, semester))
+            if sem_id is None:
+                sem_id = semesters[(user_id, semester)] = len(sem_names)
+                sem_names.append(semester)
+                sem_owner.append(s_idx)
+            sem_ids.append(sem_id)
+
+        user_ids = list(students)
+        student_schemes = [schemes.get(user_id, DEFAULT_SCHEME) for user_id in user_ids]
+        offsets, points_table = _points_table(student_schemes)
+        row_schemes = {user_id: (offsets[s.key], s.codes, s.unknown_code)
+                       for user_id, s in zip(user_ids, student_schemes)}
+        codes = []
+        for user_id, grade in zip(row_users, grades):
+            offset, scheme_codes, unknown = row_schemes[user_id]
+            codes.append(offset + scheme_codes.get(grade, unknown))
+        arrays = cls._build(codes, credits, is_gpa, sem_ids, sem_names, sem_owner,
+                            student_schemes, points_table)
+        return arrays, user_ids
+
+    @property
+    def n_students(self):
+        return len(self.schemes)
+
+    @property
+    def nbytes(self):
+        return (self.grade_codes.nbytes + self.credits.nbytes + self.is_gpa.nbytes
+                + self.semester_ids.nbytes + self.semester_owner.nbytes)
+
+    def score(self):
+        """
+        Per-semester SGPA/credits, final SGPA and standing for every student,
+        shaped like grade_transcript results. Sums use np.bincount, which adds
+        in input order, and _round2 rounds like round(), so results match
+        calculate_sgpa.
+        """
+        n_sems = len(self.semester_names)
+        n_students = self.n_students
+        points = self.points_table[self.grade_codes]
+        credits = self.credits.astype(np.float64)
+        counted = self.is_gpa & ~np.isnan(points)
+
+        ids = self.semester_ids[counted]
+        sem_credits = np.bincount(ids, weights=credits[counted], minlength=n_sems)
+        sem_points = np.bincount(ids, weights=(points * credits)[counted], minlength=n_sems)
+
+        sem_sgpa = _round2(sem_points, sem_credits)
+        total_credits = np.bincount(self.semester_owner, weights=sem_credits, minlength=n_students)
+        total_points = np.bincount(self.semester_owner, weights=sem_sgpa * sem_credits, minlength=n_students)
+        final_sgpa = _round2(total_points, total_credits)
+
+        semesters = [[] for _ in range(n_students)]
+        for name, s_idx, sgpa, sem_credit in zip(self.semester_names, self.semester_owner.tolist(),
+                                              sem_sgpa.tolist(), sem_credits.tolist()):
+            semesters[s_idx].append({"semester": name, "sgpa": sgpa, "credits": sem_credit})
+        return [
+            {"semesters": sems, "final_sgpa": final, "standing": scheme.standing(final)}
+            for sems, scheme, final in zip(semesters, self.schemes, final_sgpa.tolist())
+        ]
@@ -1,39 +1,34 @@
-grade_point_map = {
-    "A+": 4.2,
-    "A": 4.0,
-    "A-": 3.7,
-    "B+": 3.3,
-    "B": 3.0,
-    "B-": 2.7,
-    "C+": 2.3,
-    "C": 2.0,
-    "C-": 1.5,
-    "D": 1.0,
-    "F": 0.0,
-    "I-we": 0.0,
-}
-
-
-def calculate_sgpa(modules):
+from app.grade.schemes import DEFAULT_SCHEME
+from app.grade.compact import ModuleArrays
+
+# Grade points and standings of the default scheme (see schemes.json)
+grade_point_map = DEFAULT_SCHEME.grade_point_map
+
+# Academic standings from best to worst, as returned by get_academic_standing
+STANDINGS = DEFAULT_SCHEME.standings
+
+
+def calculate_sgpa(modules, scheme=None):
+    points_map = (scheme or DEFAULT_SCHEME).grade_point_map
     total_credits = 0
     total_points = 0
     for m in modules:
-        if m.is_gpa and m.grade in grade_point_map:
-            gp = grade_point_map[m.grade]
+        if m.is_gpa and m.grade in points_map:
+            gp = points_map[m.grade]
             total_credits += m.credits
             total_points += gp * m.credits
     sgpa = round(total_points / total_credits, 2) if total_credits else 0.0
     return sgpa, total_credits
 
 
-def get_academic_standing(gpa):
-    if gpa >= 3.7:
-        return "First Class"
-    elif gpa >= 3.3:
-        return "Second Class - Upper Division"
-    elif gpa >= 3.0:
-        return "Second Class - Lower Division"
-    elif gpa >= 2.0:
-        return "Pass"
-    else:
-        return "Fail"
+def calculate_cohort_sgpa(students, schemes=None):
+    """
+    Score many students at once. `students` is a list of semester lists and
+    `schemes` an optional parallel list of grading schemes (default scheme
+    otherwise). Modules are packed into ModuleArrays and scored with NumPy.
+    """
+    return ModuleArrays.from_students(students, schemes).score()
+
+
+def get_academic_standing(gpa, scheme=None):
+    return (scheme or DEFAULT_SCHEME).standing(gpa)
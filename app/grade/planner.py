@@ -0,0 +1,241 @@
+import math
+from app.grade.schemes import DEFAULT_SCHEME
+from app.grade.service import grade_transcript
+
+# Search cost grows with the number of planned modules and the credit
+# precision, so both are limited; credits follow the frontend's 0.5 steps
+MAX_REMAINING = 30
+CREDIT_STEP = 0.5
+MAX_CREDITS = 6.0
+
+
+def _scale(values):
+    """Smallest power of ten that makes every value an integer"""
+    for digits in range(7):
+        factor = 10 ** digits
+        if all(abs(v * factor - round(v * factor)) < 1e-9 for v in values):
+            return factor
+    raise ValueError("Credits and grade points must have at most 6 decimals")
+
+
+def _check_credits(credits, where, maximum=None):
+    for c in credits:
+        if abs(c / CREDIT_STEP - round(c / CREDIT_STEP)) > 1e-9 or (maximum is not None and c > maximum):
+            limit = f" up to {maximum:g}" if maximum is not None else ""
+            raise ValueError(f"Credits of {where} must be multiples of {CREDIT_STEP:g}{limit}, got {c:g}")
+
+
+def _reachable(credits, options):
+    """
+    Subset-sum DP over integer credit-weighted grade points. `options` maps
+    scaled points to a grade; returns one layer per module, each mapping a
+    reachable total to (previous total, grade) for backtracking.
+    """
+    layers = []
+    totals = {0: None}
+    for c in credits:
+        layer = {}
+        for total in totals:
+            for points, grade in options.items():
+                layer.setdefault(total + c * points, (total, grade))
+        layers.append(layer)
+        totals = layer
+    return layers
+
+
+def _backtrack(layers, total):
+    grades = []
+    for layer in reversed(layers):
+        total, grade = layer[total]
+        grades.append(grade)
+    return grades[::-1]
+
+
+def _pareto(options, cost=lambda value: value):
+    """
+    Keep the entries of `options` (contribution -> value) that no entry with
+    a higher contribution matches or beats on cost. Passing only depends on
+    the total contribution, so the others can never be part of a cheapest plan.
+    """
+    front = {}
+    best = None
+    for contribution in sorted(options, reverse=True):
+        value = options[contribution]
+        if best is None or cost(value) < best:
+            front[contribution] = value
+            best = cost(value)
+    return front
+
+
+def _with_plan(semesters, remaining, grades):
+    """Completed semesters plus the remaining modules graded as planned"""
+    planned = {sem["name"]: {"name": sem["name"], "modules": list(sem["modules"])} for sem in semesters}
+    for module, grade in zip(remaining, grades):
+        semester = planned.setdefault(module["semester"], {"name": module["semester"], "modules": []})
+        semester["modules"].append({
+            "code": module["code"],
+            "title": module["title"],
+            "grade": grade,
+            "credits": module["credits"],
+            "is_gpa": module["is_gpa"],
+        })
+    return list(planned.values())
+
+
+def plan_grades(semesters, remaining, target="First Class", min_grade="C", scheme=None):
+    """
+    Find the lowest grades for the remaining modules that still reach the
+    `target` standing. Every grade is at least `min_grade`, and the plan
+    minimises the total credit-weighted grade points.
+
+    `semesters` are completed semesters and `remaining` planned modules
+    (code, title, credits, is_gpa, semester), as dicts. At most MAX_REMAINING
+    modules are planned, and credits must be multiples of CREDIT_STEP.
+
+    SGPAs are rounded per semester, so the search runs in two levels. Within
+    each semester a DP over scaled grade-point totals keeps the cheapest total
+    for every rounded SGPA. Across semesters a second DP combines those into
+    the cheapest cost for every final total, keeping only totals no higher
+    total beats on cost. Candidates are then checked with grade_transcript,
+    cheapest first.
+    """
+    scheme = scheme or DEFAULT_SCHEME
+    threshold = scheme.threshold(target)
+    if threshold is None:
+        raise ValueError(f"Unknown target standing: {target}")
+    if min_grade not in scheme.grade_point_map:
+        raise ValueError(f"Unknown grade: {min_grade}")
+    if len(remaining) > MAX_REMAINING:
+        raise ValueError(f"At most {MAX_REMAINING} remaining modules can be planned, got {len(remaining)}")
+    _check_credits([m["credits"] for m in remaining], "remaining modules", MAX_CREDITS)
+
+    # One grade per distinct point value, the best grade first on ties
+    floor = scheme.grade_point_map[min_grade]
+    by_points = {}
+    for grade, points in scheme.grade_point_map.items():
+        if points >= floor:
+            by_points.setdefault(points, grade)
+
+    current = grade_transcript(semesters, scheme)
+    grades = [min_grade] * len(remaining)
+
+    # Only GPA modules with credits move the SGPA; the rest keep the minimum grade
+    groups = {}
+    for i, m in enumerate(remaining):
+        if m["is_gpa"] and m["credits"] > 0:
+            groups.setdefault(m["semester"], []).append(i)
+
+    # Graded GPA modules already in the semesters being planned, as (points, credits)
+    base = {name: [] for name in groups}
+    for sem in semesters:
+        if sem["name"] in base:
+            base[sem["name"]] += [
+                (scheme.grade_point_map[m["grade"]], m["credits"]) for m in sem["modules"]
+                if m["is_gpa"] and m["grade"] in scheme.grade_point_map
+            ]
+
+    _check_credits([credits for graded in base.values() for _, credits in graded],
+                   "graded modules in planned semesters")
+    credit_scale = _scale(
+        [remaining[i]["credits"] for indices in groups.values() for i in indices]
+        + [credits for graded in base.values() for _, credits in graded]
+    )
+    point_scale = _scale(list(by_points))
+    options = {round(points * point_scale): grade for points, grade in sorted(by_points.items())}
+
+    fixed = [r for r in current["semesters"] if r["semester"] not in groups]
+    fixed_points = sum(r["sgpa"] * r["credits"] for r in fixed)
+    semester_credits = {
+        name: sum(c for _, c in base[name]) + sum(remaining[i]["credits"] for i in indices)
+        for name, indices in groups.items()
+    }
+    total_credits = sum(r["credits"] for r in fixed) + sum(semester_credits.values())
+    if not total_credits:
+        result = grade_transcript(_with_plan(semesters, remaining, grades), scheme)
+        return _plan_response(target, threshold, current, remaining, grades, result, False)
+
+    # Per semester: rounded SGPA contribution (sgpa * 100 * scaled credits) -> cheapest total.
+    # The SGPA is summed module by module like calculate_sgpa so float rounding matches.
+    semester_layers = {}
+    semester_options = {}
+    for name, indices in groups.items():
+        layers = semester_layers[name] = _reachable(
+            [round(remaining[i]["credits"] * credit_scale) for i in indices], options
+        )
+        credits = semester_credits[name]
+        scaled_credits = round(credits * credit_scale)
+        cheapest = {}
+        for total in sorted(layers[-1]):
+            points = 0
+            for gp, c in base[name]:
+                points += gp * c
+            for i, grade in zip(indices, _backtrack(layers, total)):
+                points += scheme.grade_point_map[grade] * remaining[i]["credits"]
+            cheapest.setdefault(round(round(points / credits, 2) * 100) * scaled_credits, total)
+        semester_options[name] = _pareto(cheapest)
+
+    # Across semesters: combined contribution -> (cost, previous contribution, total).
+    # Contributions past `enough` pass whatever the rounding, so they are merged,
+    # and states that cannot reach `needed` even with top grades later are dropped.
+    enough = max(math.ceil(((threshold + 0.006) * total_credits - fixed_points) * 100 * credit_scale), 0)
+    needed = math.floor(((threshold - 0.006) * total_credits - fixed_points) * 100 * credit_scale)
+    names = list(semester_options)
+    headroom = [sum(max(semester_options[n]) for n in names[k + 1:]) for k in range(len(names))]
+    steps = []
+    combined = {0: (0, None, None)}
+    for name, later in zip(names, headroom):
+        merged = {}
+        for contribution, (cost, _, _) in combined.items():
+            for value, total in semester_options[name].items():
+                key = contribution + value
+                if key + later < needed:
+                    continue
+                if key > enough:
+                    key = enough
+                if key not in merged or cost + total < merged[key][0]:
+                    merged[key] = (cost + total, contribution, total)
+        combined = _pareto(merged, cost=lambda state: state[0])
+        steps.append(combined)
+
+    def chosen_totals(contribution):
+        chosen = {}
+        for name, step in zip(reversed(names), reversed(steps)):
+            _, contribution, chosen[name] = step[contribution]
+        return chosen
+
+    def evaluate(chosen):
+        for name, indices in groups.items():
+            for i, grade in zip(indices, _backtrack(semester_layers[name], chosen[name])):
+                grades[i] = grade
+        return grade_transcript(_with_plan(semesters, remaining, grades), scheme)
+
+    # Candidates that reach the threshold before the final rounding, less a
+    # small margin for float error, cheapest first
+    candidates = sorted(
+        (cost, contribution) for contribution, (cost, _, _) in combined.items()
+        if (fixed_points + contribution / (100 * credit_scale)) / total_credits >= threshold - 0.006
+    )
+    for _, contribution in candidates:
+        result = evaluate(chosen_totals(contribution))
+        if result["final_sgpa"] >= threshold:
+            return _plan_response(target, threshold, current, remaining, grades, result, True)
+
+    # Unreachable: report the best possible outcome
+    best = {name: max(cheapest.values()) for name, cheapest in semester_options.items()}
+    result = evaluate(best)
+    return _plan_response(target, threshold, current, remaining, grades, result, False)
+
+
+def _plan_response(target, threshold, current, remaining, grades, result, achievable):
+    return {
+        "target": target,
+        "threshold": threshold,
+        "achievable": achievable,
+        "current": {"final_sgpa": current["final_sgpa"], "standing": current["standing"]},
+        "plan": [
+            {"semester": m["semester"], "code": m["code"], "title": m["title"],
+             "credits": m["credits"], "grade": grade}
+            for m, grade in zip(remaining, grades)
+        ],
+        "result": result,
+    }
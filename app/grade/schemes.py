@@ -0,0 +1,119 @@
+import json
+import os
+from bisect import bisect_right
+from functools import lru_cache
+import numpy as np
+
+SCHEMES_PATH = os.environ.get(
+    "SGPA_GRADING_SCHEMES",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "schemes.json"),
+)
+
+
+class GradingScheme:
+    """
+    A grading scheme compiled for fast lookups: grades get integer codes,
+    `points` is a NumPy array indexed by code and standings are found with
+    bisect over ascending thresholds.
+    """
+
+    __slots__ = ("name", "version", "departments", "batches", "is_default",
+                 "grades", "codes", "grade_point_map", "points", "unknown_code",
+                 "_thresholds", "_labels", "_lowest", "standings", "key")
+
+    def __init__(self, name, version, grade_points, standings,
+                 departments=(), batches=(), default=False):
+        self.name = name
+        self.version = version
+        self.departments = frozenset(departments)
+        self.batches = frozenset(batches)
+        self.is_default = default
+        self.grades = tuple(grade_points)
+        self.codes = {grade: code for code, grade in enumerate(self.grades)}
+        self.grade_point_map = dict(grade_points)
+        # Codes past the last grade mean "not a grade of this scheme" (NaN points)
+        self.unknown_code = len(self.grades)
+        self.points = np.array([*grade_points.values(), np.nan], dtype=np.float64)
+
+        # standings: [label, minimum] from best to worst; the last has no minimum
+        self.standings = [label for label, _ in standings]
+        ranked = sorted(
+            ((minimum, label) for label, minimum in standings if minimum is not None),
+        )
+        self._thresholds = [minimum for minimum, _ in ranked]
+        self._labels = [label for _, label in ranked]
+        self._lowest = standings[-1][0]
+        self.key = f"{name}@{version}"
+
+    def standing(self, gpa):
+        idx = bisect_right(self._thresholds, gpa) - 1
+        return self._labels[idx] if idx >= 0 else self._lowest
+
+    def threshold(self, label):
+        """Minimum GPA of a standing, None for the lowest one or unknown labels"""
+        if label in self._labels:
+            return self._thresholds[self._labels.index(label)]
+        return None
+
+    def code(self, grade):
+        return self.codes.get(grade, self.unknown_code)
+
+    def matches(self, department, batch):
+        return ((not self.departments or department in self.departments)
+                and (not self.batches or batch in self.batches))
+
+    def specificity(self):
+        return bool(self.departments) + bool(self.batches)
+
+    def __repr__(self):
+        return f"GradingScheme({self.key!r})"
+
+
+def load_schemes(path=SCHEMES_PATH):
+    """Read and compile grading schemes from a JSON or YAML file"""
+    with open(path) as f:
+        if path.endswith((".yaml", ".yml")):
+            import yaml
+
+            config = yaml.safe_load(f)
+        else:
+            config = json.load(f)
+    schemes = [GradingScheme(**scheme) for scheme in config["schemes"]]
+    if sum(s.is_default for s in schemes) != 1:
+        raise ValueError(f"{path} must mark exactly one grading scheme as default")
+    return schemes
+
+
+# Compiled once at import
+SCHEMES = load_schemes()
+DEFAULT_SCHEME = next(s for s in SCHEMES if s.is_default)
+SCHEMES_BY_KEY = {s.key: s for s in SCHEMES}
+
+
+# Departments and batches some scheme is limited to; any other value matches like None
+DEPARTMENTS = frozenset().union(*(s.departments for s in SCHEMES))
+BATCHES = frozenset().union(*(s.batches for s in SCHEMES))
+
+
+def get_scheme(department=None, batch=None):
+    """
+    The most specific scheme matching a department and batch (the newest
+    version wins ties), falling back to the default scheme.
+    """
+    # Values no scheme lists are dropped before the cache, so its size is
+    # bounded by the schemes file rather than by what clients send
+    return _resolve_scheme(
+        department if department in DEPARTMENTS else None,
+        batch if batch in BATCHES else None,
+    )
+
+
+@lru_cache(maxsize=None)
+def _resolve_scheme(department, batch):
+    candidates = [
+        s for s in SCHEMES
+        if not s.is_default and s.matches(department, batch)
+    ]
+    if not candidates:
+        return DEFAULT_SCHEME
+    return max(candidates, key=lambda s: (s.specificity(), s.version))
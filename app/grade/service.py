@@ -0,0 +1,52 @@
+from app.schema.gpa_schema import Semester
+from app.grade.function import calculate_sgpa, get_academic_standing
+
+
+def _as_semester(semester):
+    if isinstance(semester, Semester):
+        return semester
+    return Semester.model_validate(semester)
+
+
+def grade_semester(semester, scheme=None):
+    """
+    Calculate the SGPA of a single semester (model or plain dict)
+    """
+    semester = _as_semester(semester)
+    sgpa, credits = calculate_sgpa(semester.modules, scheme)
+    return {"semester": semester.name, "sgpa": sgpa, "credits": credits}
+
+
+def final_result(semester_results, scheme=None):
+    """
+    Final SGPA and standing from per-semester results, without rescoring modules
+    """
+    total_credits = 0
+    total_points = 0
+    for result in semester_results:
+        total_credits += result["credits"]
+        total_points += result["sgpa"] * result["credits"]
+    final_sgpa = round(total_points / total_credits, 2) if total_credits else 0.0
+    return {"final_sgpa": final_sgpa, "standing": get_academic_standing(final_sgpa, scheme)}
+
+
+def grade_transcript(semesters, scheme=None):
+    """
+    Calculate per-semester SGPAs, the final SGPA and the academic standing in one pass
+    """
+    semester_results = [grade_semester(sem, scheme) for sem in semesters]
+    return {"semesters": semester_results, **final_result(semester_results, scheme)}
+
+
+def update_results(semester_results, semester, scheme=None):
+    """
+    Apply a one-semester change to the per-semester results of a transcript
+    graded with `scheme`. Only the changed semester is graded; the final SGPA
+    is summed from the stored results (at most nine), in the original order
+    so rounding matches a full recompute.
+    """
+    updated = {r["semester"]: r for r in semester_results}
+    result = grade_semester(semester, scheme)
+    updated[result["semester"]] = result
+    semester_results = list(updated.values())
+    return {"semesters": semester_results, **final_result(semester_results, scheme)}
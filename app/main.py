@@ -1,23 +1,271 @@
-from fastapi import FastAPI
-from app.schema.gpa_schema import Semester
-from app.grade.function import calculate_sgpa, get_academic_standing
+import hashlib
+import os
+import re
+from datetime import datetime, timezone
+from fastapi import FastAPI, HTTPException, Query, Request, UploadFile
+from fastapi.responses import FileResponse, StreamingResponse, JSONResponse
+from app.schema.gpa_schema import Semester, Student, StudentRecord, ExportRequest, PlanRequest
+from app.grade.function import calculate_cohort_sgpa
+from app.grade.schemes import get_scheme
+from app.grade.planner import plan_grades
+from app.grade.service import grade_semester, grade_transcript
+from app.cache import LRUCache
+from app.export.jobs import export_jobs, MIME_TYPES
+from app.export.transcript import build_transcript, check_unique_codes
+from app.export.bulk import stream_archive
+from app.metrics import ProfilingRoute, metrics_middleware, metrics_response, cache_collector
+from app.ratelimit import rate_limit_middleware
+from database import async_operations
+from database.operations import iter_transcripts, set_transcript, update_transcript
+from database import analytics
 
+# Keep this module free of pandas, reportlab and pyarrow imports: every API
+# worker loads it, and exports and imports load them only when first used
 app = FastAPI()
+# Endpoints run under cProfile on demand, see app.metrics
+app.router.route_class = ProfilingRoute
+# Registered first so it runs inside the metrics middleware and 429s are counted
+app.middleware("http")(rate_limit_middleware)
+app.middleware("http")(metrics_middleware)
 
+# Whole-response caches for identical payloads, sized via environment
+RESULT_CACHE_SIZE = int(os.environ.get("SGPA_RESULT_CACHE_SIZE", 10_000))
+RESULT_CACHE_TTL = float(os.environ.get("SGPA_RESULT_CACHE_TTL", 3600)) or None
+sgpa_cache = LRUCache(maxsize=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL)
+final_sgpa_cache = LRUCache(maxsize=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL)
+transcript_cache = LRUCache(maxsize=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL)
+cache_collector.register("sgpa", sgpa_cache)
+cache_collector.register("final_sgpa", final_sgpa_cache)
+cache_collector.register("transcript", transcript_cache)
 
+
+async def _body_key(request, scheme):
+    """
+    Result cache key: the scheme and a digest of the raw request body, which
+    FastAPI has already read. Much cheaper than serialising the parsed models,
+    at the cost of missing on payloads that differ only in formatting.
+    """
+    return scheme.key, hashlib.sha256(await request.body()).digest()
+
+
+# Grading takes tens of microseconds, so these run on the event loop rather
+# than in the thread pool
 @app.post("/sgpa/")
-def calculate_semester_sgpa(semester: Semester):
-    sgpa, credits = calculate_sgpa(semester.modules)
-    return {"semester": semester.name, "sgpa": sgpa, "credits": credits}
+async def calculate_semester_sgpa(request: Request, semester: Semester,
+                                  department: str | None = None, batch: str | None = None):
+    scheme = get_scheme(department, batch)
+    key = await _body_key(request, scheme)
+    return sgpa_cache.get_or_compute(key, lambda: grade_semester(semester, scheme))
 
 
 @app.post("/final-sgpa/")
-def calculate_final_sgpa(semesters: list[Semester]):
-    total_credits = 0
-    total_points = 0
-    for sem in semesters:
-        sgpa, credits = calculate_sgpa(sem.modules)
-        total_credits += credits
-        total_points += sgpa * credits
-    final_sgpa = round(total_points / total_credits, 2) if total_credits else 0.0
-    return {"final_sgpa": final_sgpa, "standing": get_academic_standing(final_sgpa)}
+async def calculate_final_sgpa(request: Request, semesters: list[Semester],
+                               department: str | None = None, batch: str | None = None):
+    scheme = get_scheme(department, batch)
+
+    def compute():
+        result = grade_transcript(semesters, scheme)
+        return {"final_sgpa": result["final_sgpa"], "standing": result["standing"]}
+
+    key = await _body_key(request, scheme)
+    return final_sgpa_cache.get_or_compute(key, compute)
+
+
+@app.post("/transcript/")
+async def calculate_transcript(request: Request, semesters: list[Semester],
+                               department: str | None = None, batch: str | None = None):
+    scheme = get_scheme(department, batch)
+    key = await _body_key(request, scheme)
+    return transcript_cache.get_or_compute(key, lambda: grade_transcript(semesters, scheme))
+
+
+@app.post("/cohort-sgpa/")
+def calculate_cohort(students: list[Student]):
+    results = calculate_cohort_sgpa(
+        [s.semesters for s in students],
+        [get_scheme(s.department, s.batch) for s in students],
+    )
+    for student, result in zip(students, results):
+        result["registration_number"] = student.registration_number
+    return results
+
+
+@app.post("/plan")
+def plan(request: PlanRequest, department: str | None = None, batch: str | None = None):
+    try:
+        return plan_grades(
+            [sem.model_dump() for sem in request.semesters],
+            [m.model_dump() for m in request.remaining],
+            request.target,
+            request.min_grade,
+            get_scheme(department, batch),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.put("/transcripts/{transcript_id}")
+def put_transcript(transcript_id: str, semesters: list[Semester],
+                   department: str | None = None, batch: str | None = None):
+    return set_transcript(transcript_id, semesters, get_scheme(department, batch))
+
+
+@app.patch("/transcripts/{transcript_id}")
+def patch_transcript(transcript_id: str, semester: Semester):
+    result = update_transcript(transcript_id, semester)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Unknown transcript, PUT the full transcript first")
+    return result
+
+
+@app.get("/healthz")
+def healthz():
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+async def readyz():
+    try:
+        await async_operations.ping()
+    except Exception as e:
+        return JSONResponse(status_code=503, content={"status": "unavailable", "database": str(e)})
+    return {"status": "ready"}
+
+
+@app.get("/metrics")
+def prometheus_metrics():
+    return metrics_response()
+
+
+@app.get("/metrics/cache")
+def cache_metrics():
+    return {
+        "sgpa": sgpa_cache.stats(),
+        "final_sgpa": final_sgpa_cache.stats(),
+        "transcript": transcript_cache.stats(),
+    }
+
+
+@app.get("/students/{reg_number}")
+async def read_student(reg_number: str):
+    user_data = await async_operations.get_user_data(reg_number)
+    if user_data is None:
+        raise HTTPException(status_code=404, detail="No data found for this registration number")
+    return user_data
+
+
+@app.get("/students/{reg_number}/versions")
+async def read_student_versions(reg_number: str):
+    versions = await async_operations.get_transcript_versions(reg_number)
+    if not versions:
+        raise HTTPException(status_code=404, detail="No saved versions for this registration number")
+    return versions
+
+
+@app.get("/students/{reg_number}/transcript")
+async def read_student_transcript(reg_number: str, version: int | None = None, as_of: datetime | None = None):
+    # Versions are stamped in naive UTC
+    if as_of is not None and as_of.tzinfo is not None:
+        as_of = as_of.astimezone(timezone.utc).replace(tzinfo=None)
+    transcript = await async_operations.get_transcript_as_of(reg_number, version, as_of)
+    if transcript is None:
+        raise HTTPException(status_code=404, detail="No transcript version found")
+    return transcript
+
+
+@app.post("/students", status_code=201)
+async def save_student(record: StudentRecord):
+    semesters = [sem.model_dump() for sem in record.semesters]
+    try:
+        check_unique_codes(semesters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    results = grade_transcript(record.semesters, get_scheme(record.department, record.batch))
+    saved = await async_operations.save_user_data(
+        record.name,
+        record.registration_number,
+        record.department,
+        record.batch,
+        semesters,
+        results=results,
+    )
+    if not saved:
+        raise HTTPException(status_code=500, detail="Error saving data to database")
+    return {"registration_number": record.registration_number, **results}
+
+
+def _export_status(job_id):
+    try:
+        status = export_jobs.status(job_id)
+    except ValueError:
+        status = {"job_id": job_id, "status": "missing"}
+    if status["status"] == "missing":
+        raise HTTPException(status_code=404, detail="Unknown export job")
+    return status
+
+
+@app.post("/exports", status_code=202)
+def create_export(request: ExportRequest):
+    record = request.student
+    semesters = [sem.model_dump() for sem in record.semesters]
+    transcript = build_transcript(
+        record.name,
+        record.registration_number,
+        record.department,
+        record.batch,
+        semesters,
+        grade_transcript(record.semesters, get_scheme(record.department, record.batch)),
+    )
+    return export_jobs.status(export_jobs.submit(transcript, request.format))
+
+
+@app.get("/exports/cohort")
+def export_cohort(batch: str | None = None, department: str | None = None, format: str = "pdf"):
+    if format not in MIME_TYPES:
+        raise HTTPException(status_code=400, detail="format must be pdf or xlsx")
+    if not (batch or department):
+        raise HTTPException(status_code=400, detail="Give a batch and/or a department")
+    name = re.sub(r"[^A-Za-z0-9_.-]", "_", "_".join(part for part in (batch, department) if part))
+    return StreamingResponse(
+        stream_archive(iter_transcripts(batch=batch, department=department), format),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="transcripts_{name}.zip"'},
+    )
+
+
+@app.get("/exports/{job_id}")
+def get_export(job_id: str):
+    return _export_status(job_id)
+
+
+@app.get("/exports/{job_id}/file")
+def download_export(job_id: str):
+    status = _export_status(job_id)
+    if status["status"] != "done":
+        raise HTTPException(status_code=409, detail=f"Export is {status['status']}")
+    fmt = job_id.rsplit(".", 1)[1]
+    return FileResponse(export_jobs.path(job_id), media_type=MIME_TYPES[fmt], filename=f"sgpa_results.{fmt}")
+
+
+@app.post("/imports")
+def import_results(file: UploadFile):
+    from database.importer import import_file
+
+    filename = (file.filename or "").lower()
+    if not filename.endswith((".csv", ".xlsx")):
+        raise HTTPException(status_code=400, detail="Upload a .csv or .xlsx grade sheet")
+    try:
+        return import_file(file.file, fmt="xlsx" if filename.endswith(".xlsx") else "csv")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/analytics/{batch}")
+def batch_analytics(batch: str, department: str | None = None):
+    return analytics.batch_summary(batch, department)
+
+
+@app.get("/analytics/{batch}/ranks")
+def batch_ranks(batch: str, department: str | None = None,
+                limit: int = Query(100, ge=1, le=1000), offset: int = Query(0, ge=0)):
+    return analytics.rank_list(batch, department, limit=limit, offset=offset)
@@ -0,0 +1,172 @@
+import contextvars
+import cProfile
+import functools
+import inspect
+import os
+import time
+import uuid
+from fastapi import Response
+from fastapi.routing import APIRoute
+from prometheus_client import Counter, Histogram, REGISTRY, CONTENT_TYPE_LATEST, CollectorRegistry, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from sqlalchemy import event
+
+PROFILING_ENABLED = os.environ.get("SGPA_ENABLE_PROFILING") == "1"
+PROFILE_DIR = os.environ.get("SGPA_PROFILE_DIR", "profiles")
+PROFILE_HEADER = "x-profile"
+
+REQUEST_LATENCY = Histogram(
+    "sgpa_request_duration_seconds", "HTTP request latency", ["method", "route", "status"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUEST_BYTES = Counter("sgpa_request_bytes", "HTTP request body bytes", ["route"])
+RESPONSE_BYTES = Counter("sgpa_response_bytes", "HTTP response body bytes", ["route"])
+DB_QUERY_LATENCY = Histogram(
+    "sgpa_db_query_duration_seconds", "SQL statement latency", ["statement"],
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1),
+)
+PERSISTENCE_OPERATIONS = Counter(
+    "sgpa_persistence_operations", "Saves and loads by outcome", ["operation", "outcome"]
+)
+
+
+class CacheCollector:
+    """Exposes LRUCache counters registered by name"""
+
+    def __init__(self):
+        self.caches = {}
+
+    def register(self, name, cache):
+        self.caches[name] = cache
+
+    def collect(self):
+        counters = {
+            field: CounterMetricFamily(f"sgpa_cache_{field}", f"Cache {field}", labels=["cache"])
+            for field in ("hits", "misses", "evictions", "expirations", "coalesced")
+        }
+        size = GaugeMetricFamily("sgpa_cache_size", "Entries in cache", labels=["cache"])
+        for name, cache in self.caches.items():
+            stats = cache.stats()
+            for field, family in counters.items():
+                family.add_metric([name], stats[field])
+            size.add_metric([name], stats["size"])
+        yield from counters.values()
+        yield size
+
+
+cache_collector = CacheCollector()
+REGISTRY.register(cache_collector)
+
+
+def instrument_engine(engine):
+    """Time every SQL statement run on a sync Engine (or AsyncEngine.sync_engine)"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+        context._sgpa_query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "_sgpa_query_start", None)
+        if start is not None:
+            kind = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+            DB_QUERY_LATENCY.labels(kind).observe(time.perf_counter() - start)
+
+
+def metrics_response():
+    """
+    Metrics of this process, or of every worker when running under gunicorn
+    (PROMETHEUS_MULTIPROC_DIR set). Cache counters are always per process.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
+    from prometheus_client import multiprocess
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    registry.register(cache_collector)
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+
+# Set by the middleware for requests that asked to be profiled
+_profile_request = contextvars.ContextVar("sgpa_profile_request", default=None)
+
+
+def _dump_profile(profiler, holder):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}.prof")
+    profiler.dump_stats(path)
+    holder["path"] = path
+
+
+def profiled(endpoint):
+    """
+    Wrap an endpoint so it runs under cProfile when its request asked for it.
+    Sync endpoints are profiled in the worker thread that runs them.
+    """
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def async_wrapper(*args, **kwargs):
+            holder = _profile_request.get()
+            if holder is None:
+                return await endpoint(*args, **kwargs)
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                profiler.disable()
+                _dump_profile(profiler, holder)
+        return async_wrapper
+
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        holder = _profile_request.get()
+        if holder is None:
+            return endpoint(*args, **kwargs)
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(endpoint, *args, **kwargs)
+        finally:
+            _dump_profile(profiler, holder)
+    return wrapper
+
+
+class ProfilingRoute(APIRoute):
+    """Route class that makes every endpoint profilable on demand"""
+
+    def __init__(self, path, endpoint, **kwargs):
+        super().__init__(path, profiled(endpoint), **kwargs)
+
+
+async def metrics_middleware(request, call_next):
+    """
+    Record latency and payload sizes per route template. With profiling
+    enabled (SGPA_ENABLE_PROFILING=1) an `X-Profile: 1` request header saves
+    a cProfile dump under SGPA_PROFILE_DIR and names it in `X-Profile-File`.
+    """
+    holder = None
+    token = None
+    if PROFILING_ENABLED and request.headers.get(PROFILE_HEADER) == "1":
+        holder = {}
+        token = _profile_request.set(holder)
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        if token is not None:
+            _profile_request.reset(token)
+    elapsed = time.perf_counter() - start
+
+    route = request.scope.get("route")
+    route_path = route.path if route is not None else "unmatched"
+    REQUEST_LATENCY.labels(request.method, route_path, response.status_code).observe(elapsed)
+    request_size = request.headers.get("content-length")
+    if request_size:
+        REQUEST_BYTES.labels(route_path).inc(int(request_size))
+    response_size = response.headers.get("content-length")
+    if response_size:
+        RESPONSE_BYTES.labels(route_path).inc(int(response_size))
+    if holder and holder.get("path"):
+        response.headers["X-Profile-File"] = holder["path"]
+    return response
@@ -0,0 +1,135 @@
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from fastapi.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+# Tokens refilled per second and bucket size, per client; off unless a rate is set
+RATE = float(os.environ.get("SGPA_RATE_LIMIT", 0))
+BURST = int(os.environ.get("SGPA_RATE_LIMIT_BURST", 20))
+# Redis-compatible server shared by all workers, e.g. redis://localhost:6379/0
+REDIS_URL = os.environ.get("SGPA_RATE_LIMIT_REDIS_URL")
+# Reverse proxies in front of the API that append to X-Forwarded-For; 0 uses the socket address
+TRUSTED_PROXIES = int(os.environ.get("SGPA_TRUSTED_PROXIES", 0))
+
+# Probes and scrapes are never limited
+EXEMPT_PATHS = {"/healthz", "/readyz", "/metrics"}
+
+
+class MemoryBackend:
+    """
+    Token buckets in this process. Buckets of idle clients are dropped least
+    recently used first once `max_clients` is reached.
+    """
+
+    def __init__(self, rate, burst, max_clients=100_000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def take(self, key, cost=1):
+        """Take `cost` tokens; returns (allowed, seconds until enough tokens)"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        return allowed, 0.0 if allowed else (cost - tokens) / self.rate
+
+
+# KEYS[1] bucket; ARGV rate, burst, cost. Refill and take run atomically on the server.
+TOKEN_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'last')
+local tokens = tonumber(bucket[1]) or burst
+local last = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - last) * rate)
+local allowed = 0
+if tokens >= cost then
+  tokens = tokens - cost
+  allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'last', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+return {allowed, tostring(tokens)}
+"""
+
+
+class RedisBackend:
+    """
+    Token buckets in Redis, shared by every worker and host. `client` is any
+    redis-py compatible asyncio client (e.g. fakeredis.FakeAsyncRedis locally).
+    """
+
+    def __init__(self, client, rate, burst, prefix="sgpa:ratelimit:"):
+        self.rate = rate
+        self.burst = burst
+        self.prefix = prefix
+        self._script = client.register_script(TOKEN_BUCKET_LUA)
+
+    async def take(self, key, cost=1):
+        allowed, tokens = await self._script(keys=[self.prefix + key], args=[self.rate, self.burst, cost])
+        allowed = bool(int(allowed))
+        return allowed, 0.0 if allowed else (cost - float(tokens)) / self.rate
+
+
+def make_backend():
+    if not RATE:
+        return None
+    if REDIS_URL:
+        from redis import asyncio as redis
+
+        return RedisBackend(redis.Redis.from_url(REDIS_URL), RATE, BURST)
+    return MemoryBackend(RATE, BURST)
+
+
+backend = make_backend()
+
+
+def client_key(request):
+    """
+    The client address. Behind TRUSTED_PROXIES proxies it is the
+    X-Forwarded-For entry appended by the outermost one; entries left of it
+    come from the client and can be forged.
+    """
+    if TRUSTED_PROXIES:
+        hops = [hop.strip() for hop in request.headers.get("x-forwarded-for", "").split(",") if hop.strip()]
+        if hops:
+            return hops[-min(TRUSTED_PROXIES, len(hops))]
+    return request.client.host if request.client else "unknown"
+
+
+async def rate_limit_middleware(request, call_next):
+    """
+    Answer 429 with Retry-After once a client has used up its bucket. When
+    the backend fails (e.g. Redis is down) requests are let through.
+    """
+    if backend is None or request.url.path in EXEMPT_PATHS:
+        return await call_next(request)
+    try:
+        allowed, retry_after = await backend.take(client_key(request))
+    except Exception:
+        logger.exception("Rate limit backend failed, allowing request")
+        allowed = True
+    if not allowed:
+        return JSONResponse(
+            status_code=429,
+            content={"detail": "Too many requests, slow down"},
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+    return await call_next(request)
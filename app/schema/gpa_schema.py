@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List
+from typing import List, Literal, Optional
 
 
 class Module(BaseModel):
@@ -13,3 +13,38 @@ class Module(BaseModel):
 class Semester(BaseModel):
     name: str
     modules: List[Module]
+
+
+class Student(BaseModel):
+    registration_number: Optional[str] = None
+    department: Optional[str] = None
+    batch: Optional[str] = None
+    semesters: List[Semester]
+
+
+class StudentRecord(BaseModel):
+    name: str
+    registration_number: str
+    department: str
+    batch: str
+    semesters: List[Semester]
+
+
+class ExportRequest(BaseModel):
+    format: Literal["xlsx", "pdf"]
+    student: StudentRecord
+
+
+class PlannedModule(BaseModel):
+    code: str
+    title: str = ""
+    credits: float
+    is_gpa: bool = True
+    semester: str = "Planned"
+
+
+class PlanRequest(BaseModel):
+    semesters: List[Semester] = []
+    remaining: List[PlannedModule]
+    target: str = "First Class"
+    min_grade: str = "C"
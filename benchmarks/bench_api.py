@@ -0,0 +1,47 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from synthetic import make_semester, make_transcript
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(main.app) as client:
+        yield client
+
+
+def _clear_caches():
+    main.sgpa_cache.clear()
+    main.final_sgpa_cache.clear()
+
+
+def bench_sgpa_endpoint(benchmark, client, rng):
+    payload = make_semester(rng, 0)
+
+    def run():
+        _clear_caches()
+        return client.post("/sgpa/", json=payload)
+
+    assert benchmark(run).status_code == 200
+
+
+def bench_final_sgpa_endpoint(benchmark, client, rng):
+    payload = make_transcript(rng)
+
+    def run():
+        _clear_caches()
+        return client.post("/final-sgpa/", json=payload)
+
+    assert benchmark(run).status_code == 200
+
+
+def bench_final_sgpa_endpoint_cached(benchmark, client, rng):
+    payload = make_transcript(rng)
+    client.post("/final-sgpa/", json=payload)
+    assert benchmark(client.post, "/final-sgpa/", json=payload).status_code == 200
+
+
+def bench_cohort_endpoint(benchmark, client, cohort):
+    payload = cohort[:500]
+    assert benchmark(client.post, "/cohort-sgpa/", json=payload).status_code == 200
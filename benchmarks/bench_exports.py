@@ -0,0 +1,25 @@
+import pytest
+
+from app.export.render import render_excel, render_pdf
+from app.export.transcript import build_transcript
+from app.grade.service import grade_transcript
+from synthetic import make_student
+
+
+@pytest.fixture(scope="module")
+def transcript():
+    import random
+
+    student = make_student(random.Random(7), 1, modules=8)
+    return build_transcript(
+        student["name"], student["registration_number"], student["department"],
+        student["batch"], student["semesters"], grade_transcript(student["semesters"]),
+    )
+
+
+def bench_render_excel(benchmark, transcript):
+    assert benchmark(render_excel, transcript)
+
+
+def bench_render_pdf(benchmark, transcript):
+    assert benchmark(render_pdf, transcript)
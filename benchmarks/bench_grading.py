@@ -0,0 +1,46 @@
+import time
+
+from app.grade.compact import ModuleArrays
+from app.grade.function import calculate_sgpa, calculate_cohort_sgpa
+from app.grade.service import grade_transcript
+from app.schema.gpa_schema import Semester, Student
+from synthetic import make_semester, make_transcript
+
+
+def bench_calculate_sgpa(benchmark, rng):
+    semester = Semester.model_validate(make_semester(rng, 0, modules=20))
+    benchmark(calculate_sgpa, semester.modules)
+
+
+def bench_grade_transcript(benchmark, rng):
+    semesters = [Semester.model_validate(s) for s in make_transcript(rng)]
+    benchmark(grade_transcript, semesters)
+
+
+def bench_cohort_scalar(benchmark, cohort):
+    students = [Student.model_validate(s).semesters for s in cohort]
+    benchmark(lambda: [grade_transcript(semesters) for semesters in students])
+
+
+def bench_cohort_vectorized(benchmark, cohort):
+    students = [Student.model_validate(s).semesters for s in cohort]
+    benchmark(calculate_cohort_sgpa, students)
+
+
+def bench_cohort_vectorized_beats_scalar(cohort):
+    students = [Student.model_validate(s).semesters for s in cohort]
+    best = {"scalar": float("inf"), "vectorized": float("inf")}
+    for _ in range(7):
+        start = time.perf_counter()
+        scalar = [grade_transcript(semesters) for semesters in students]
+        best["scalar"] = min(best["scalar"], time.perf_counter() - start)
+        start = time.perf_counter()
+        vectorized = calculate_cohort_sgpa(students)
+        best["vectorized"] = min(best["vectorized"], time.perf_counter() - start)
+    assert vectorized == scalar
+    assert best["vectorized"] < best["scalar"], best
+
+
+def bench_module_arrays_score(benchmark, cohort):
+    arrays = ModuleArrays.from_students([Student.model_validate(s).semesters for s in cohort])
+    benchmark(arrays.score)
@@ -0,0 +1,58 @@
+"""
+Import-time budget: the Streamlit frontend and the API workers must start
+without loading heavy libraries they only need for some requests.
+Measured in fresh interpreters with `python -X importtime`.
+"""
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Milliseconds the frontend may spend importing on top of streamlit itself
+FRONTEND_BUDGET_MS = float(os.environ.get("SGPA_IMPORT_BUDGET_MS", 100))
+
+# Loaded on first calculate, export or history load only
+FRONTEND_LAZY = {"pandas", "reportlab", "openpyxl", "pyarrow", "numpy", "sqlalchemy", "fastapi", "requests"}
+# Loaded on first export, import or snapshot only
+API_LAZY = {"pandas", "reportlab", "openpyxl", "pyarrow"}
+
+
+def import_times(*args):
+    """Run python -X importtime; returns {module: self time in microseconds}"""
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")]))}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    errors = [line for line in proc.stderr.splitlines() if not line.startswith("import time:")]
+    assert proc.returncode == 0, "\n".join(errors[-20:])
+    times = {}
+    for line in proc.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            self_us, _, name = line[len("import time:"):].split("|")
+            if self_us.strip().isdigit():
+                times[name.strip()] = int(self_us)
+    return times
+
+
+def top_level(modules):
+    return {name.split(".")[0] for name in modules}
+
+
+def bench_frontend_import_budget():
+    baseline = import_times("-c", "import streamlit")
+    # Runs the script in Streamlit's bare mode: every widget at its default
+    frontend = import_times(os.path.join("app", "frontend", "streamlit_app.py"))
+    extra = {name: us for name, us in frontend.items() if name not in baseline}
+
+    eager = top_level(extra) & FRONTEND_LAZY
+    assert not eager, f"frontend imports {sorted(eager)} at startup"
+    total_ms = sum(extra.values()) / 1000
+    slowest = sorted(extra.items(), key=lambda item: -item[1])[:5]
+    assert total_ms <= FRONTEND_BUDGET_MS, f"frontend imports took {total_ms:.1f} ms, slowest {slowest}"
+
+
+def bench_api_import_lazy():
+    eager = top_level(import_times("-c", "import app.main")) & API_LAZY
+    assert not eager, f"app.main imports {sorted(eager)} at startup"
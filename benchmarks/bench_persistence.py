@@ -0,0 +1,75 @@
+import itertools
+
+import pytest
+from sqlalchemy import delete, func, insert, select
+
+from conftest import DB_SIZES
+from synthetic import make_cohort, make_student
+from database.models import init_db, User, SGPA, SemesterResult, FinalResult, TranscriptVersion
+from database.operations import WriteSession, save_user_data, get_user_data
+
+MODULES_PER_STUDENT = 48
+
+
+@pytest.fixture(scope="module", params=DB_SIZES, ids=lambda n: f"{n}_rows")
+def populated_db(request):
+    """A database holding roughly `n` module rows, bulk loaded outside the timings"""
+    init_db()
+    n_students = max(1, request.param // MODULES_PER_STUDENT)
+    with WriteSession.begin() as session:
+        for table in (TranscriptVersion, SGPA, SemesterResult, FinalResult, User):
+            session.execute(delete(table))
+        cohort = make_cohort(n_students)
+        for start in range(0, n_students, 1000):
+            chunk = cohort[start:start + 1000]
+            session.execute(insert(User), [
+                {k: s[k] for k in ("name", "registration_number", "department", "batch")}
+                for s in chunk
+            ])
+            ids = dict(session.execute(
+                select(User.registration_number, User.id)
+                .where(User.registration_number.in_([s["registration_number"] for s in chunk]))
+            ).all())
+            session.execute(insert(SGPA), [
+                {
+                    "user_id": ids[s["registration_number"]],
+                    "semester": sem["name"],
+                    "module_code": m["code"],
+                    "module_title": m["title"],
+                    "grade": m["grade"],
+                    "credits": m["credits"],
+                    "is_gpa": m["is_gpa"],
+                }
+                for s in chunk
+                for sem in s["semesters"]
+                for m in sem["modules"]
+            ])
+        rows = session.scalar(select(func.count()).select_from(SGPA))
+    return {"students": n_students, "rows": rows}
+
+
+def bench_get_user_data(benchmark, populated_db):
+    reg_number = f"BN{populated_db['students'] // 2:07d}"
+    assert benchmark(get_user_data, reg_number) is not None
+
+
+def bench_save_user_data(benchmark, populated_db, rng):
+    counter = itertools.count(10_000_000)
+
+    def run():
+        student = make_student(rng, next(counter))
+        return save_user_data(
+            student["name"], student["registration_number"], student["department"],
+            student["batch"], student["semesters"],
+        )
+
+    assert benchmark(run)
+
+
+def bench_save_user_data_unchanged(benchmark, populated_db, rng):
+    student = make_student(rng, 20_000_000)
+    args = (student["name"], student["registration_number"], student["department"],
+            student["batch"], student["semesters"])
+    save_user_data(*args)
+    # Repeat saves match the stored transcript hash and write nothing
+    assert benchmark(save_user_data, *args)
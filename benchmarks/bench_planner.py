@@ -0,0 +1,25 @@
+"""
+Grade planner timing at the input limits; its plans are checked against
+exhaustive search in tests/test_planner.py.
+"""
+import pytest
+
+from app.grade.planner import plan_grades, MAX_REMAINING, MAX_CREDITS
+
+CREDITS = [c / 2 for c in range(1, int(MAX_CREDITS * 2) + 1)]
+
+
+def make_remaining(rng, semesters, per_semester):
+    return [
+        {"code": f"P{s}{m:02d}", "title": "", "credits": rng.choice(CREDITS),
+         "is_gpa": True, "semester": f"Semester {s + 1}"}
+        for s in range(semesters)
+        for m in range(per_semester)
+    ]
+
+
+@pytest.mark.parametrize("semesters", [1, 3, 9])
+def bench_plan_grades_at_limit(benchmark, rng, semesters):
+    # The cross-semester search is the expensive part, so spread the modules out
+    remaining = make_remaining(rng, semesters, MAX_REMAINING // semesters)
+    benchmark(plan_grades, [], remaining, "First Class", "F")
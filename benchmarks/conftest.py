@@ -0,0 +1,29 @@
+import os
+import random
+import sys
+import tempfile
+
+import pytest
+
+# Benchmarks run against a throwaway database; set before database is imported
+_DB_DIR = tempfile.mkdtemp(prefix="sgpa-bench-")
+os.environ.setdefault("SGPA_DATABASE_URL", f"sqlite:///{os.path.join(_DB_DIR, 'bench.db')}")
+os.environ.setdefault("SGPA_EXPORT_DIR", os.path.join(_DB_DIR, "exports"))
+# API benchmarks send thousands of requests from one client
+os.environ.setdefault("SGPA_RATE_LIMIT", "0")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import make_cohort
+
+# Module-row counts for persistence benchmarks; add 1000000 for the full run
+DB_SIZES = [int(n) for n in os.environ.get("SGPA_BENCH_DB_SIZES", "1000,100000").split(",")]
+
+
+@pytest.fixture
+def rng():
+    return random.Random(42)
+
+
+@pytest.fixture(scope="session")
+def cohort():
+    return make_cohort(2000)
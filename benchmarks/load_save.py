@@ -0,0 +1,60 @@
+"""
+Load test for concurrent saves.
+
+Runs many save_user_data calls from a thread pool against a fresh database
+and fails if the sustained rate drops below the target writes/sec:
+
+    python benchmarks/load_save.py --workers 16 --saves 2000 --target 100
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from synthetic import make_transcript
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--saves", type=int, default=2000)
+    parser.add_argument("--target", type=float, default=100.0, help="minimum writes/sec")
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ["SGPA_DATABASE_URL"] = args.database_url
+    else:
+        path = os.path.join(tempfile.mkdtemp(), "load.db")
+        os.environ["SGPA_DATABASE_URL"] = f"sqlite:///{path}"
+
+    from database.models import init_db
+    from database.operations import save_user_data
+
+    init_db()
+    rng = random.Random(42)
+    payloads = [
+        (f"Student {i}", f"LT{i:06d}", "Business Analytics", "Batch 20", make_transcript(rng))
+        for i in range(args.saves)
+    ]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(lambda p: save_user_data(*p), payloads))
+    elapsed = time.perf_counter() - start
+
+    failures = results.count(False)
+    rate = len(results) / elapsed
+    print(f"{len(results)} saves with {args.workers} workers in {elapsed:.2f}s "
+          f"= {rate:.1f} writes/sec, {failures} failed")
+    if failures or rate < args.target:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
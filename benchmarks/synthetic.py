@@ -0,0 +1,42 @@
+"""
+Synthetic transcripts shared by the benchmarks and load_save.py
+"""
+import random
+
+GRADES = ["A+", "A", "A-", "B+", "B", "B-", "C+", "C", "C-", "D", "F"]
+DEPARTMENTS = ["Business Analytics", "Financial Service Management", "Business Process Management"]
+
+
+def make_semester(rng, index, modules=6):
+    return {
+        "name": f"Semester {index + 1}",
+        "modules": [
+            {
+                "code": f"BM{index + 1}{m:02d}",
+                "title": f"Module {index + 1}.{m}",
+                "grade": rng.choice(GRADES),
+                "credits": rng.choice([2.0, 2.5, 3.0]),
+                "is_gpa": rng.random() > 0.05,
+            }
+            for m in range(modules)
+        ],
+    }
+
+
+def make_transcript(rng, semesters=8, modules=6):
+    return [make_semester(rng, s, modules) for s in range(semesters)]
+
+
+def make_student(rng, index, semesters=8, modules=6):
+    return {
+        "name": f"Student {index}",
+        "registration_number": f"BN{index:07d}",
+        "department": rng.choice(DEPARTMENTS),
+        "batch": f"Batch {rng.randint(17, 22)}",
+        "semesters": make_transcript(rng, semesters, modules),
+    }
+
+
+def make_cohort(n_students, seed=0, semesters=8, modules=6):
+    rng = random.Random(seed)
+    return [make_student(rng, i, semesters, modules) for i in range(n_students)]
@@ -0,0 +1,101 @@
+import math
+from sqlalchemy import select, func, cast, Integer
+from .models import User, FinalResult
+from .operations import Session
+from app.grade.schemes import get_scheme
+
+
+def _cohort_filter(stmt, batch, department):
+    stmt = stmt.join(User, User.id == FinalResult.user_id).where(User.batch == batch)
+    if department:
+        stmt = stmt.where(User.department == department)
+    return stmt
+
+
+def rank_list(batch, department=None, limit=100, offset=0):
+    """
+    Students of a batch ordered by final SGPA with their rank and percentile
+    (share of the cohort at or below their SGPA). Reads only final_results.
+    """
+    order = FinalResult.final_sgpa.desc()
+    stmt = _cohort_filter(
+        select(
+            User.registration_number,
+            User.name,
+            User.department,
+            FinalResult.final_sgpa,
+            FinalResult.academic_standing,
+            func.rank().over(order_by=order).label("rank"),
+            func.cume_dist().over(order_by=FinalResult.final_sgpa).label("cume_dist"),
+        ),
+        batch,
+        department,
+    ).order_by(order, User.registration_number).limit(limit).offset(offset)
+
+    with Session() as session:
+        return [
+            {
+                "rank": rank,
+                "registration_number": reg_number,
+                "name": name,
+                "department": dept,
+                "final_sgpa": final_sgpa,
+                "standing": standing,
+                "percentile": round(cume_dist * 100, 1),
+            }
+            for reg_number, name, dept, final_sgpa, standing, rank, cume_dist in session.execute(stmt)
+        ]
+
+
+def batch_summary(batch, department=None, bin_width=0.5):
+    """
+    Count, mean, range, a histogram of final SGPA and the number of students
+    in each academic standing, computed in SQL over final_results.
+    """
+    with Session() as session:
+        count, mean, lowest, highest = session.execute(_cohort_filter(
+            select(
+                func.count(),
+                func.avg(FinalResult.final_sgpa),
+                func.min(FinalResult.final_sgpa),
+                func.max(FinalResult.final_sgpa),
+            ).select_from(FinalResult),
+            batch,
+            department,
+        )).one()
+
+        bucket = cast(FinalResult.final_sgpa / bin_width, Integer)
+        bins = dict(session.execute(_cohort_filter(
+            select(bucket, func.count()).select_from(FinalResult),
+            batch,
+            department,
+        ).group_by(bucket)).all())
+
+        standings = dict(session.execute(_cohort_filter(
+            select(FinalResult.academic_standing, func.count()).select_from(FinalResult),
+            batch,
+            department,
+        ).group_by(FinalResult.academic_standing)).all())
+
+    scheme = get_scheme(department, batch)
+    n_bins = math.floor(max(scheme.grade_point_map.values()) / bin_width) + 1
+    return {
+        "batch": batch,
+        "department": department,
+        "students": count,
+        "mean_sgpa": round(mean, 2) if mean is not None else None,
+        "min_sgpa": lowest,
+        "max_sgpa": highest,
+        "histogram": [
+            {
+                "from": round(i * bin_width, 2),
+                "to": round((i + 1) * bin_width, 2),
+                "count": bins.get(i, 0),
+            }
+            for i in range(n_bins)
+        ],
+        "standings": {
+            **{standing: 0 for standing in scheme.standings},
+            **standings,
+        },
+    }
@@ -0,0 +1,86 @@
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from .models import get_database_url, engine_options, configure_sqlite
+from .operations import save_transcript, user_data_query, rows_to_user_data
+from .history import list_versions, transcript_as_of
+from app.grade.service import grade_transcript
+from app.grade.schemes import get_scheme
+from app.metrics import instrument_engine, PERSISTENCE_OPERATIONS
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Async drivers used in place of the sync ones in SGPA_DATABASE_URL
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg": "postgresql+psycopg_async",
+}
+
+def get_async_database_url(url=None):
+    url = url or get_database_url()
+    scheme, _, rest = url.partition("://")
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}://{rest}"
+
+def make_async_engine(url=None):
+    url = get_async_database_url(url)
+    async_engine = create_async_engine(url, **engine_options(url))
+    if url.startswith("sqlite"):
+        configure_sqlite(async_engine.sync_engine, url)
+    instrument_engine(async_engine.sync_engine)
+    return async_engine
+
+# Create async engine and session factories
+async_engine = make_async_engine()
+AsyncSession = async_sessionmaker(async_engine)
+AsyncWriteSession = async_sessionmaker(async_engine.execution_options(sqlite_begin="IMMEDIATE"))
+
+async def ping():
+    """Run a trivial query; raises if the database cannot be reached"""
+    async with async_engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+async def save_user_data(name, reg_number, department, batch, semester_data, results=None):
+    """
+    Async counterpart of operations.save_user_data
+    """
+    async with AsyncWriteSession() as session:
+        try:
+            if results is None:
+                results = grade_transcript(semester_data, get_scheme(department, batch))
+            await session.run_sync(
+                save_transcript, name, reg_number, department, batch, semester_data, results
+            )
+            await session.commit()
+            PERSISTENCE_OPERATIONS.labels("save", "success").inc()
+            return True
+        except Exception:
+            await session.rollback()
+            PERSISTENCE_OPERATIONS.labels("save", "error").inc()
+            logger.exception("Error saving data")
+            return False
+
+async def get_user_data(reg_number):
+    """
+    Async counterpart of operations.get_user_data
+    """
+    async with AsyncSession() as session:
+        try:
+            result = await session.execute(user_data_query(reg_number))
+            user_data = rows_to_user_data(result.all())
+            PERSISTENCE_OPERATIONS.labels("load", "found" if user_data else "missing").inc()
+            return user_data
+        except Exception:
+            PERSISTENCE_OPERATIONS.labels("load", "error").inc()
+            logger.exception("Error retrieving data")
+            return None
+
+async def get_transcript_versions(reg_number):
+    """Final SGPA and standing of every saved version of a student"""
+    async with AsyncSession() as session:
+        return await session.run_sync(list_versions, reg_number)
+
+async def get_transcript_as_of(reg_number, version=None, at=None):
+    """A student's transcript as of a version or datetime, see history.transcript_as_of"""
+    async with AsyncSession() as session:
+        return await session.run_sync(transcript_as_of, reg_number, version, at)
@@ -0,0 +1,158 @@
+import os
+from sqlalchemy import select, insert, func
+from .models import User, TranscriptVersion
+
+# A full copy of the transcript is stored every this many versions
+CHECKPOINT_EVERY = int(os.environ.get("SGPA_VERSION_CHECKPOINT_EVERY", 10))
+
+MODULE_FIELDS = ("module_title", "grade", "credits", "is_gpa")
+
+
+def _module_entry(key, module):
+    return [*key, *(module[field] for field in MODULE_FIELDS)]
+
+
+def record_version(session, user_id, user, previous, modules, results, checkpoint=False):
+    """
+    Append the next transcript version of a student. `previous` and `modules`
+    map (semester, module code) to module rows before and after the save,
+    `user` holds name/department/batch. A checkpoint is written every
+    CHECKPOINT_EVERY versions, or when `checkpoint` is set because `previous`
+    may not match the last version (first save, or modules imported since).
+    """
+    version = (session.scalar(
+        select(func.max(TranscriptVersion.version)).where(TranscriptVersion.user_id == user_id)
+    ) or 0) + 1
+    checkpoint = checkpoint or (version - 1) % CHECKPOINT_EVERY == 0
+    if checkpoint:
+        data = {"user": user, "modules": [_module_entry(key, m) for key, m in modules.items()]}
+    else:
+        data = {
+            "user": user,
+            "upsert": [
+                _module_entry(key, m) for key, m in modules.items()
+                if key not in previous or any(previous[key][f] != m[f] for f in MODULE_FIELDS)
+            ],
+            "delete": [list(key) for key in previous if key not in modules],
+        }
+    data["results"] = results
+    session.execute(insert(TranscriptVersion), {
+        "user_id": user_id,
+        "version": version,
+        "is_checkpoint": checkpoint,
+        "data": data,
+        "final_sgpa": results["final_sgpa"],
+        "academic_standing": results["standing"],
+    })
+    return version
+
+
+def record_checkpoints(session, checkpoints):
+    """
+    Append a checkpoint version for each of many students at once (used after
+    bulk imports, which change module rows outside saves). `checkpoints` maps
+    user id to (user, modules, results) as passed to record_version.
+    """
+    if not checkpoints:
+        return
+    latest = dict(session.execute(
+        select(TranscriptVersion.user_id, func.max(TranscriptVersion.version))
+        .where(TranscriptVersion.user_id.in_(list(checkpoints)))
+        .group_by(TranscriptVersion.user_id)
+    ).all())
+    session.execute(insert(TranscriptVersion), [
+        {
+            "user_id": user_id,
+            "version": latest.get(user_id, 0) + 1,
+            "is_checkpoint": True,
+            "data": {
+                "user": user,
+                "modules": [_module_entry(key, m) for key, m in modules.items()],
+                "results": results,
+            },
+            "final_sgpa": results["final_sgpa"],
+            "academic_standing": results["standing"],
+        }
+        for user_id, (user, modules, results) in checkpoints.items()
+    ])
+
+
+def _apply(state, data):
+    if "modules" in data:
+        state["modules"] = {tuple(entry[:2]): entry for entry in data["modules"]}
+    else:
+        for key in data["delete"]:
+            state["modules"].pop(tuple(key), None)
+        for entry in data["upsert"]:
+            state["modules"][tuple(entry[:2])] = entry
+    state["user"] = data["user"]
+    state["results"] = data["results"]
+
+
+def list_versions(session, reg_number):
+    """Version number, time, final SGPA and standing of every save, oldest first"""
+    rows = session.execute(
+        select(TranscriptVersion.version, TranscriptVersion.created_at,
+               TranscriptVersion.final_sgpa, TranscriptVersion.academic_standing)
+        .join(User, User.id == TranscriptVersion.user_id)
+        .where(User.registration_number == reg_number)
+        .order_by(TranscriptVersion.version)
+    ).all()
+    return [
+        {"version": version, "created_at": created_at, "final_sgpa": final_sgpa, "standing": standing}
+        for version, created_at, final_sgpa, standing in rows
+    ]
+
+
+def transcript_as_of(session, reg_number, version=None, at=None):
+    """
+    Rebuild a student's transcript as of a version number or a (naive UTC)
+    datetime, the latest version when neither is given. Looks the version up
+    by index and replays the rows from the checkpoint at or before it.
+    Returns None when the student has no such version.
+    """
+    user_id = session.scalar(select(User.id).where(User.registration_number == reg_number))
+    if user_id is None:
+        return None
+    stmt = select(TranscriptVersion.version).where(TranscriptVersion.user_id == user_id)
+    if version is not None:
+        stmt = stmt.where(TranscriptVersion.version == version)
+    elif at is not None:
+        stmt = stmt.where(TranscriptVersion.created_at <= at).order_by(TranscriptVersion.created_at.desc())
+    else:
+        stmt = stmt.order_by(TranscriptVersion.version.desc())
+    target = session.scalar(stmt.limit(1))
+    if target is None:
+        return None
+
+    start = session.scalar(
+        select(func.max(TranscriptVersion.version)).where(
+            TranscriptVersion.user_id == user_id,
+            TranscriptVersion.is_checkpoint,
+            TranscriptVersion.version <= target,
+        )
+    )
+    rows = session.execute(
+        select(TranscriptVersion.data, TranscriptVersion.created_at)
+        .where(
+            TranscriptVersion.user_id == user_id,
+            TranscriptVersion.version.between(start, target),
+        )
+        .order_by(TranscriptVersion.version)
+    ).all()
+    state = {}
+    for data, _ in rows:
+        _apply(state, data)
+
+    semesters = {}
+    for semester, code, title, grade, credits, is_gpa in state["modules"].values():
+        semesters.setdefault(semester, []).append(
+            {"code": code, "title": title, "grade": grade, "credits": credits, "is_gpa": is_gpa}
+        )
+    return {
+        "version": target,
+        "created_at": rows[-1][1],
+        "user": {"registration_number": reg_number, **state["user"]},
+        "semesters": [{"name": name, "modules": modules} for name, modules in semesters.items()],
+        "results": state["results"],
+    }
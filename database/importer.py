@@ -0,0 +1,173 @@
+"""
+Bulk import of grade sheets (CSV or XLSX) into the database.
+
+    python -m database.importer results_batch20.csv
+
+One row per module with the columns registration_number, name, department,
+batch, semester, module_code, module_title, grade, credits and optionally
+is_gpa. Files are read in chunks; each chunk is validated with vectorized
+pandas operations and written in its own transaction.
+"""
+import argparse
+import os
+import pandas as pd
+from sqlalchemy import select
+from app.grade.schemes import SCHEMES
+from .models import User
+from .operations import WriteSession, dialect_insert, upsert_modules, refresh_summaries
+
+USER_COLUMNS = ["registration_number", "name", "department", "batch"]
+MODULE_COLUMNS = ["semester", "module_code", "module_title", "grade"]
+REQUIRED_COLUMNS = USER_COLUMNS + MODULE_COLUMNS + ["credits"]
+FALSE_VALUES = ["false", "no", "n", "0", "0.0"]
+MAX_ERRORS = 100
+LOOKUP_BATCH = 500
+# Grades of every configured scheme; each student is scored with their own scheme
+KNOWN_GRADES = sorted(set().union(*(scheme.grades for scheme in SCHEMES)))
+
+
+def read_chunks(source, fmt="csv", chunksize=50_000):
+    """Yield DataFrames of at most `chunksize` rows from a CSV or XLSX file"""
+    if fmt == "csv":
+        yield from pd.read_csv(source, chunksize=chunksize, dtype=str, keep_default_na=False)
+        return
+
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(c) if c is not None else "" for c in next(rows, [])]
+        start = 0
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunksize:
+                yield pd.DataFrame(chunk, columns=header, index=range(start, start + len(chunk)))
+                start += len(chunk)
+                chunk = []
+        if chunk:
+            yield pd.DataFrame(chunk, columns=header, index=range(start, start + len(chunk)))
+    finally:
+        workbook.close()
+
+
+def validate_chunk(df):
+    """
+    Normalise and validate a chunk. Returns (valid rows, list of errors).
+    Raises ValueError if required columns are missing.
+    """
+    df = df.rename(columns=lambda c: str(c).strip().lower().replace(" ", "_"))
+    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+
+    text_columns = USER_COLUMNS + MODULE_COLUMNS
+    for col in text_columns:
+        df[col] = df[col].astype("string").str.strip()
+    df["credits"] = pd.to_numeric(df["credits"], errors="coerce")
+    if "is_gpa" in df.columns:
+        is_gpa = df["is_gpa"].astype("string").str.strip().str.lower()
+        df["is_gpa"] = ~is_gpa.isin(FALSE_VALUES).fillna(False).astype(bool)
+    else:
+        df["is_gpa"] = True
+
+    blank = df[text_columns].fillna("").eq("").any(axis=1)
+    bad_grade = ~df["grade"].isin(KNOWN_GRADES).fillna(False).astype(bool)
+    bad_credits = df["credits"].isna() | (df["credits"] < 0)
+    invalid = blank | bad_grade | bad_credits
+
+    errors = []
+    for idx in df.index[invalid][:MAX_ERRORS]:
+        reasons = [
+            reason
+            for reason, mask in (
+                ("missing value", blank),
+                (f"unknown grade {df.at[idx, 'grade']!r}", bad_grade),
+                ("invalid credits", bad_credits),
+            )
+            if mask.at[idx]
+        ]
+        # +2: header row and 1-based line numbers
+        errors.append({"row": int(idx) + 2, "error": ", ".join(reasons)})
+    return df.loc[~invalid, REQUIRED_COLUMNS + ["is_gpa"]], errors
+
+
+def import_chunk(session, df):
+    """Upsert the chunk's students and their module rows; returns their user ids"""
+    users = df.drop_duplicates("registration_number", keep="last")[USER_COLUMNS]
+    stmt = dialect_insert(session, User)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["registration_number"],
+        set_={
+            **{col: stmt.excluded[col] for col in ["name", "department", "batch"]},
+            # Imported modules change the transcript, so the next save must write
+            "transcript_hash": None,
+        },
+    )
+    session.execute(stmt, users.to_dict("records"))
+
+    reg_numbers = users["registration_number"].tolist()
+    user_ids = {}
+    for i in range(0, len(reg_numbers), LOOKUP_BATCH):
+        batch = reg_numbers[i:i + LOOKUP_BATCH]
+        user_ids.update(
+            (reg, user_id)
+            for user_id, reg in session.execute(
+                select(User.id, User.registration_number).where(User.registration_number.in_(batch))
+            )
+        )
+
+    modules = df.assign(user_id=df["registration_number"].map(user_ids))
+    modules = modules[["user_id", "semester", "module_code", "module_title", "grade", "credits", "is_gpa"]]
+    modules = modules.drop_duplicates(["user_id", "semester", "module_code"], keep="last")
+    session.execute(upsert_modules(session), modules.to_dict("records"))
+    return set(user_ids.values())
+
+
+def import_file(source, fmt=None, chunksize=50_000):
+    """
+    Import a grade sheet. `source` is a path or a binary file object; `fmt`
+    ("csv" or "xlsx") defaults to the file extension. Returns a summary.
+    """
+    if fmt is None:
+        fmt = "xlsx" if str(getattr(source, "name", source)).lower().endswith(".xlsx") else "csv"
+
+    summary = {"rows": 0, "imported": 0, "rejected": 0, "students": 0, "errors": []}
+    touched = set()
+    for chunk in read_chunks(source, fmt=fmt, chunksize=chunksize):
+        valid, errors = validate_chunk(chunk)
+        summary["rows"] += len(chunk)
+        summary["rejected"] += len(chunk) - len(valid)
+        summary["errors"].extend(errors[:MAX_ERRORS - len(summary["errors"])])
+        if valid.empty:
+            continue
+        with WriteSession.begin() as session:
+            touched |= import_chunk(session, valid)
+        summary["imported"] += len(valid)
+
+    # Refresh semester and final results once per student, in batches
+    touched = sorted(touched)
+    for i in range(0, len(touched), LOOKUP_BATCH):
+        with WriteSession.begin() as session:
+            refresh_summaries(session, touched[i:i + LOOKUP_BATCH])
+    summary["students"] = len(touched)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import a CSV/XLSX grade sheet")
+    parser.add_argument("path")
+    parser.add_argument("--chunksize", type=int, default=50_000)
+    args = parser.parse_args()
+
+    fmt = "xlsx" if os.path.splitext(args.path)[1].lower() == ".xlsx" else "csv"
+    summary = import_file(args.path, fmt=fmt, chunksize=args.chunksize)
+    print(f"Imported {summary['imported']} of {summary['rows']} rows for {summary['students']} students, "
+          f"{summary['rejected']} rejected")
+    for error in summary["errors"]:
+        print(f"  row {error['row']}: {error['error']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
-from models import init_db
+from models import engine
+from migrate import migrate
 
 if __name__ == "__main__":
     print("Initializing database...")
-    init_db()
-    print("Database initialized successfully!") 
\ No newline at end of file
+    # Creates missing tables and upgrades tables made by older versions
+    migrate(engine)
+    print("Database initialized successfully!")
@@ -0,0 +1,97 @@
+from sqlalchemy import inspect
+from models import engine, Base, SGPA
+
+LEGACY_COLUMNS = {"semester_sgpa", "semester_credits", "final_sgpa", "academic_standing"}
+# Non-unique index of databases whose saves appended module rows
+LEGACY_MODULE_INDEX = "ix_sgpa_records_user_semester"
+
+
+def migrate(engine):
+    """
+    Move per-module semester/final results of a legacy sgpa.db into the
+    semester_results and final_results tables, drop the repeated columns,
+    remove module rows repeated by appending saves and create any columns and
+    indexes missing from tables made by older versions.
+    Safe to run more than once.
+    """
+    Base.metadata.create_all(engine)
+    columns = {c["name"] for c in inspect(engine).get_columns("sgpa_records")}
+    migrated = bool(LEGACY_COLUMNS & columns)
+    if migrated:
+        _split_results(engine)
+
+    if "transcript_hash" not in {c["name"] for c in inspect(engine).get_columns("users")}:
+        with engine.begin() as conn:
+            conn.exec_driver_sql("ALTER TABLE users ADD COLUMN transcript_hash VARCHAR")
+        migrated = True
+
+    if LEGACY_MODULE_INDEX in {i["name"] for i in inspect(engine).get_indexes("sgpa_records")}:
+        _dedupe_modules(engine)
+        migrated = True
+
+    # create_all does not add indexes to tables that already exist
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+    return migrated
+
+
+def _split_results(engine):
+    with engine.begin() as conn:
+        # Keep the latest result written for each semester and each student
+        conn.exec_driver_sql("""
+            INSERT OR REPLACE INTO semester_results (user_id, semester, sgpa, credits, created_at)
+            SELECT user_id, semester, semester_sgpa, semester_credits, created_at
+            FROM sgpa_records
+            WHERE id IN (
+                SELECT MAX(id) FROM sgpa_records
+                WHERE user_id IS NOT NULL AND semester_sgpa IS NOT NULL
+                GROUP BY user_id, semester
+            )
+        """)
+        conn.exec_driver_sql("""
+            INSERT OR REPLACE INTO final_results (user_id, final_sgpa, academic_standing, updated_at)
+            SELECT user_id, final_sgpa, academic_standing, created_at
+            FROM sgpa_records
+            WHERE id IN (
+                SELECT MAX(id) FROM sgpa_records
+                WHERE user_id IS NOT NULL AND final_sgpa IS NOT NULL
+                GROUP BY user_id
+            )
+        """)
+
+        # SQLite cannot drop several columns portably, so rebuild the table
+        kept = ", ".join(c.name for c in SGPA.__table__.columns)
+        conn.exec_driver_sql("ALTER TABLE sgpa_records RENAME TO sgpa_records_legacy")
+        SGPA.__table__.create(conn)
+        conn.exec_driver_sql(f"""
+            INSERT INTO sgpa_records ({kept}) SELECT {kept} FROM sgpa_records_legacy
+            WHERE id IN (
+                SELECT MAX(id) FROM sgpa_records_legacy GROUP BY user_id, semester, module_code
+            )
+        """)
+        conn.exec_driver_sql("DROP TABLE sgpa_records_legacy")
+
+    # Reclaim the space freed by the dropped columns
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.exec_driver_sql("VACUUM")
+
+
+def _dedupe_modules(engine):
+    with engine.begin() as conn:
+        # Keep the latest row saved for each module of each semester
+        conn.exec_driver_sql("""
+            DELETE FROM sgpa_records
+            WHERE id NOT IN (
+                SELECT MAX(id) FROM sgpa_records GROUP BY user_id, semester, module_code
+            )
+        """)
+        conn.exec_driver_sql(f"DROP INDEX {LEGACY_MODULE_INDEX}")
+
+
+if __name__ == "__main__":
+    print("Migrating database...")
+    if migrate(engine):
+        print("Database migrated successfully!")
+    else:
+        print("Database is already up to date.")
@@ -1,25 +1,36 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, ForeignKey, Boolean
+from sqlalchemy import create_engine, event, Column, Integer, String, Float, DateTime, ForeignKey, Boolean, JSON, UniqueConstraint, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
+import os
 
 Base = declarative_base()
 
 class User(Base):
     __tablename__ = 'users'
+    __table_args__ = (Index('ix_users_batch_department', 'batch', 'department'),)
     
     id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False)
     registration_number = Column(String, unique=True, nullable=False)
     department = Column(String, nullable=False)
     batch = Column(String, nullable=False)
+    # Hash of the last saved transcript and results; an identical save is skipped
+    transcript_hash = Column(String)
     created_at = Column(DateTime, default=datetime.utcnow)
     
-    # Relationship with SGPA records
+    # Relationships with module rows and result summaries
     sgpa_records = relationship("SGPA", back_populates="user")
+    semester_results = relationship("SemesterResult", back_populates="user")
+    final_result = relationship("FinalResult", back_populates="user", uselist=False)
+    transcript_versions = relationship("TranscriptVersion", back_populates="user")
 
 class SGPA(Base):
+    """One row per module taken by a student, saved with upserts on (user, semester, module code)"""
     __tablename__ = 'sgpa_records'
+    __table_args__ = (
+        Index('uq_sgpa_records_user_semester_module', 'user_id', 'semester', 'module_code', unique=True),
+    )
     
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey('users.id'))
@@ -29,18 +40,139 @@ class SGPA(Base):
     grade = Column(String, nullable=False)
     credits = Column(Float, nullable=False)
     is_gpa = Column(Boolean, default=True)
-    semester_sgpa = Column(Float, nullable=True)
-    semester_credits = Column(Float, nullable=True)
-    final_sgpa = Column(Float, nullable=True)
-    academic_standing = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationship with User
     user = relationship("User", back_populates="sgpa_records")
 
+class SemesterResult(Base):
+    """SGPA and credits of one semester, stored once instead of on every module row"""
+    __tablename__ = 'semester_results'
+    __table_args__ = (UniqueConstraint('user_id', 'semester'),)
+    
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    semester = Column(String, nullable=False)
+    sgpa = Column(Float, nullable=False)
+    credits = Column(Float, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    user = relationship("User", back_populates="semester_results")
+
+class FinalResult(Base):
+    """
+    Final SGPA and academic standing, one row per student. Rewritten on every
+    save and import, it doubles as the summary table cohort analytics read.
+    """
+    __tablename__ = 'final_results'
+    __table_args__ = (Index('ix_final_results_final_sgpa', 'final_sgpa'),)
+    
+    user_id = Column(Integer, ForeignKey('users.id'), primary_key=True)
+    final_sgpa = Column(Float, nullable=False)
+    academic_standing = Column(String, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    user = relationship("User", back_populates="final_result")
+
+class TranscriptVersion(Base):
+    """
+    Append-only history of saved transcripts. Checkpoint rows hold the full
+    transcript, the rows in between only what changed since the version
+    before, so any version is rebuilt from at most one checkpoint interval.
+    """
+    __tablename__ = 'transcript_versions'
+    __table_args__ = (
+        UniqueConstraint('user_id', 'version'),
+        Index('ix_transcript_versions_user_created', 'user_id', 'created_at'),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    version = Column(Integer, nullable=False)
+    is_checkpoint = Column(Boolean, nullable=False)
+    data = Column(JSON, nullable=False)
+    final_sgpa = Column(Float, nullable=False)
+    academic_standing = Column(String, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    user = relationship("User", back_populates="transcript_versions")
+
+class TranscriptState(Base):
+    """
+    Per-semester results of a transcript edited one semester at a time
+    through PUT/PATCH /transcripts/{id}, shared by every API worker.
+    """
+    __tablename__ = 'transcript_states'
+    __table_args__ = (Index('ix_transcript_states_updated_at', 'updated_at'),)
+    
+    transcript_id = Column(String, primary_key=True)
+    # GradingScheme.key the transcript was graded with
+    scheme = Column(String, nullable=False)
+    # [{semester, sgpa, credits}, ...] in the order the semesters were first sent
+    semesters = Column(JSON, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+DEFAULT_DATABASE_URL = "sqlite:///" + os.path.join(os.path.dirname(os.path.abspath(__file__)), "sgpa.db")
+
+def get_database_url():
+    return os.environ.get("SGPA_DATABASE_URL", DEFAULT_DATABASE_URL)
+
+def _is_memory_url(url):
+    return url in ("sqlite://", "sqlite:///:memory:", "sqlite+aiosqlite://", "sqlite+aiosqlite:///:memory:")
+
+def engine_options(url):
+    """Pool and connect arguments shared by the sync and async engines"""
+    if not url.startswith("sqlite"):
+        options = {"pool_pre_ping": True}
+    elif _is_memory_url(url):
+        return {}
+    else:
+        busy_timeout = int(os.environ.get("SGPA_DB_BUSY_TIMEOUT_MS", 5000))
+        options = {"connect_args": {"timeout": busy_timeout / 1000}}
+    options["pool_size"] = int(os.environ.get("SGPA_DB_POOL_SIZE", 5))
+    options["max_overflow"] = int(os.environ.get("SGPA_DB_MAX_OVERFLOW", 10))
+    return options
+
+def configure_sqlite(engine, url):
+    """
+    Run SQLite in WAL mode with synchronous=NORMAL and a busy timeout so
+    concurrent saves wait for the write lock instead of failing.
+    `engine` is a sync Engine (use AsyncEngine.sync_engine for async ones).
+    """
+    busy_timeout = int(os.environ.get("SGPA_DB_BUSY_TIMEOUT_MS", 5000))
+    in_memory = _is_memory_url(url)
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if not in_memory:
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={busy_timeout}")
+        cursor.close()
+
+    @event.listens_for(engine, "begin")
+    def begin_sqlite_transaction(conn):
+        # Writers take the lock up front; upgrading a read transaction to a
+        # write one fails immediately under WAL instead of waiting
+        mode = conn.get_execution_options().get("sqlite_begin")
+        if mode:
+            conn.exec_driver_sql(f"BEGIN {mode}")
+
+def make_engine(url=None):
+    """
+    Create the database engine from SGPA_DATABASE_URL (or `url`).
+    Any non-SQLite SQLAlchemy URL (e.g. postgresql+psycopg://...) gets a plain pooled engine.
+    """
+    url = url or get_database_url()
+    engine = create_engine(url, **engine_options(url))
+    if url.startswith("sqlite"):
+        configure_sqlite(engine, url)
+    return engine
+
 # Create database engine
-engine = create_engine('sqlite:///database/sgpa.db')
+engine = make_engine()
 
 # Create all tables
 def init_db():
-    Base.metadata.create_all(engine) 
\ No newline at end of file
+    Base.metadata.create_all(engine)
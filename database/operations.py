@@ -1,121 +1,366 @@
+from sqlalchemy import insert, delete, select, and_
 from sqlalchemy.orm import sessionmaker
-from .models import engine, User, SGPA
-from datetime import datetime
-import requests
+from .models import engine, User, SGPA, SemesterResult, FinalResult, TranscriptState
+from .history import record_version, record_checkpoints
+from datetime import datetime, timedelta
+from app.grade.service import grade_transcript, update_results
+from app.grade.compact import ModuleArrays
+from app.grade.schemes import get_scheme, SCHEMES_BY_KEY
+from app.export.transcript import transcript_from_user_data, check_unique_codes
+from app.metrics import instrument_engine, PERSISTENCE_OPERATIONS
+from app.cache import content_hash
+from itertools import groupby
+import logging
+import os
 
-# Create session factory
+logger = logging.getLogger(__name__)
+
+# Seconds a transcript edited through PUT/PATCH /transcripts/{id} is kept after its last change
+TRANSCRIPT_STATE_TTL = int(os.environ.get("SGPA_TRANSCRIPT_STATE_TTL", 7 * 24 * 3600))
+instrument_engine(engine)
+
+# Create session factories; writes begin with BEGIN IMMEDIATE on SQLite
 Session = sessionmaker(bind=engine)
+WriteSession = sessionmaker(bind=engine.execution_options(sqlite_begin="IMMEDIATE"))
+
+def dialect_insert(session, model):
+    """INSERT construct with ON CONFLICT support for the session's database"""
+    if session.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as upsert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as upsert
+    return upsert(model)
 
-def save_user_data(name, reg_number, department, batch, semester_data):
+def upsert_modules(session):
+    """INSERT for sgpa_records that updates the module already saved under the same key"""
+    stmt = dialect_insert(session, SGPA)
+    return stmt.on_conflict_do_update(
+        index_elements=["user_id", "semester", "module_code"],
+        set_={col: stmt.excluded[col] for col in ["module_title", "grade", "credits", "is_gpa"]},
+    )
+
+def replace_summaries(session, results_by_user):
     """
-    Save user data and their SGPA records to the database
+    Replace semester_results and final_results for the given students.
+    `results_by_user` maps user id to grade_transcript-shaped results.
     """
-    session = Session()
+    user_ids = list(results_by_user)
+    if not user_ids:
+        return
+    session.execute(delete(SemesterResult).where(SemesterResult.user_id.in_(user_ids)))
+    session.execute(delete(FinalResult).where(FinalResult.user_id.in_(user_ids)))
+    semester_rows = [
+        {
+            "user_id": user_id,
+            "semester": g["semester"],
+            "sgpa": g["sgpa"],
+            "credits": g["credits"]
+        }
+        for user_id, results in results_by_user.items()
+        for g in results["semesters"]
+    ]
+    if semester_rows:
+        session.execute(insert(SemesterResult), semester_rows)
+    session.execute(insert(FinalResult), [
+        {
+            "user_id": user_id,
+            "final_sgpa": results["final_sgpa"],
+            "academic_standing": results["standing"]
+        }
+        for user_id, results in results_by_user.items()
+    ])
+
+def refresh_summaries(session, user_ids):
+    """
+    Recompute the result summaries of many students from their stored module
+    rows in one vectorized pass (used after bulk imports), each with the
+    grading scheme of their department and batch, and record the imported
+    transcripts as a checkpoint version of each student.
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    users = {}
+    schemes = {}
+    for user_id, name, department, batch in session.execute(
+        select(User.id, User.name, User.department, User.batch).where(User.id.in_(user_ids))
+    ):
+        users[user_id] = {"name": name, "department": department, "batch": batch}
+        schemes[user_id] = get_scheme(department, batch)
+    rows = session.execute(
+        select(SGPA.user_id, SGPA.semester, SGPA.module_code, SGPA.module_title,
+               SGPA.grade, SGPA.credits, SGPA.is_gpa)
+        .where(SGPA.user_id.in_(user_ids))
+        .order_by(SGPA.user_id, SGPA.id)
+    ).all()
+    arrays, scored_ids = ModuleArrays.from_rows(
+        [(user_id, semester, grade, credits, is_gpa)
+         for user_id, semester, _, _, grade, credits, is_gpa in rows],
+        schemes,
+    )
+    results_by_user = dict(zip(scored_ids, arrays.score()))
+    replace_summaries(session, results_by_user)
+
+    modules_by_user = {
+        user_id: {
+            (semester, code): {"module_title": title, "grade": grade, "credits": credits, "is_gpa": is_gpa}
+            for _, semester, code, title, grade, credits, is_gpa in user_rows
+        }
+        for user_id, user_rows in groupby(rows, key=lambda row: row.user_id)
+    }
+    record_checkpoints(session, {
+        user_id: (users[user_id], modules_by_user[user_id], results)
+        for user_id, results in results_by_user.items()
+    })
+
+def save_transcript(session, name, reg_number, department, batch, semester_data, results):
+    """
+    Write a graded transcript using an open session. The caller commits.
+    Shared by the sync save below and the async one in async_operations.
+
+    Module rows are upserted on (user, semester, module code) and rows no
+    longer in the transcript are deleted, so repeated saves never pile up.
+    A save identical to the last one (same student details, modules and
+    results) is detected by its content hash and writes nothing. Raises
+    ValueError when a module code repeats within a semester, since rows are
+    keyed on it and `results` would not match what is stored.
+    """
+    check_unique_codes(semester_data)
+    modules = {
+        (semester["name"], module["code"]): {
+            "semester": semester["name"],
+            "module_code": module["code"],
+            "module_title": module["title"],
+            "grade": module["grade"],
+            "credits": module["credits"],
+            "is_gpa": module["is_gpa"]
+        }
+        for semester in semester_data
+        for module in semester["modules"]
+        if module["code"] and module["title"] and module["grade"] != "Not Selected"
+    }
+    transcript_hash = content_hash([name, department, batch, list(modules.values()), results])
+
+    existing = session.execute(
+        select(User.id, User.transcript_hash).where(User.registration_number == reg_number)
+    ).first()
+    if existing is not None and existing.transcript_hash == transcript_hash:
+        return existing.id
+
+    # Create the user or update their details
+    stmt = dialect_insert(session, User)
+    user_id = session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["registration_number"],
+            set_={col: stmt.excluded[col] for col in ["name", "department", "batch", "transcript_hash"]},
+        ).returning(User.id),
+        {
+            "name": name,
+            "registration_number": reg_number,
+            "department": department,
+            "batch": batch,
+            "transcript_hash": transcript_hash
+        }
+    ).scalar_one()
+
+    # Replace the student's result summaries
+    replace_summaries(session, {user_id: results})
+
+    # Drop modules removed from the transcript, then upsert the rest in one executemany
+    previous = {}
+    if existing is not None:
+        stale = []
+        for row_id, semester, module_code, title, grade, credits, is_gpa in session.execute(
+            select(SGPA.id, SGPA.semester, SGPA.module_code, SGPA.module_title,
+                   SGPA.grade, SGPA.credits, SGPA.is_gpa)
+            .where(SGPA.user_id == user_id)
+            .order_by(SGPA.id)
+        ):
+            previous[(semester, module_code)] = {
+                "module_title": title, "grade": grade, "credits": credits, "is_gpa": is_gpa
+            }
+            if (semester, module_code) not in modules:
+                stale.append(row_id)
+        if stale:
+            session.execute(delete(SGPA).where(SGPA.id.in_(stale)))
+    if modules:
+        session.execute(upsert_modules(session), [{"user_id": user_id, **row} for row in modules.values()])
+
+    # Rows changed outside saves (imports clear the hash) get a full checkpoint
+    record_version(
+        session, user_id, {"name": name, "department": department, "batch": batch},
+        previous, modules, results,
+        checkpoint=existing is None or existing.transcript_hash is None,
+    )
+    return user_id
+
+def save_user_data(name, reg_number, department, batch, semester_data, results=None):
+    """
+    Save user data and their SGPA records to the database.
+    `results` is the output of grade_transcript(semester_data); pass it when
+    it has already been computed so the save does not grade again.
+    """
+    session = WriteSession()
     try:
-        # Create or get user
-        user = session.query(User).filter_by(registration_number=reg_number).first()
-        if not user:
-            user = User(
-                name=name,
-                registration_number=reg_number,
-                department=department,
-                batch=batch
-            )
-            session.add(user)
-            session.flush()  # Get the user ID
-        
-        # Calculate semester-wise GPAs
-        semester_gpas = []
-        for semester in semester_data:
-            response = requests.post("http://localhost:8000/sgpa/", json=semester)
-            if response.status_code == 200:
-                sem_data = response.json()
-                semester_gpas.append({
-                    "semester": semester["name"],
-                    "sgpa": sem_data["sgpa"],
-                    "credits": sem_data["credits"]
-                })
-        
-        # Calculate final SGPA
-        response = requests.post("http://localhost:8000/final-sgpa/", json=semester_data)
-        if response.status_code == 200:
-            final_data = response.json()
-            final_sgpa = final_data["final_sgpa"]
-            standing = final_data["standing"]
-        else:
-            final_sgpa = None
-            standing = None
-        
-        # Save SGPA records
-        for semester in semester_data:
-            for module in semester["modules"]:
-                if module["code"] and module["title"] and module["grade"] != "Not Selected":
-                    # Find the corresponding semester GPA
-                    sem_gpa = next((g for g in semester_gpas if g["semester"] == semester["name"]), None)
-                    
-                    sgpa_record = SGPA(
-                        user_id=user.id,
-                        semester=semester["name"],
-                        module_code=module["code"],
-                        module_title=module["title"],
-                        grade=module["grade"],
-                        credits=module["credits"],
-                        is_gpa=module["is_gpa"],
-                        semester_sgpa=sem_gpa["sgpa"] if sem_gpa else None,
-                        semester_credits=sem_gpa["credits"] if sem_gpa else None,
-                        final_sgpa=final_sgpa,
-                        academic_standing=standing
-                    )
-                    session.add(sgpa_record)
-        
+        # Grade before touching the database so no connection is held meanwhile
+        if results is None:
+            results = grade_transcript(semester_data, get_scheme(department, batch))
+        save_transcript(session, name, reg_number, department, batch, semester_data, results)
         session.commit()
+        PERSISTENCE_OPERATIONS.labels("save", "success").inc()
         return True
-    except Exception as e:
+    except Exception:
         session.rollback()
-        print(f"Error saving data: {str(e)}")
+        PERSISTENCE_OPERATIONS.labels("save", "error").inc()
+        logger.exception("Error saving data")
         return False
     finally:
         session.close()
 
+def _user_data_select(*extra_columns):
+    return (
+        select(
+            *extra_columns,
+            User.name,
+            User.registration_number,
+            User.department,
+            User.batch,
+            SGPA.semester,
+            SGPA.module_code,
+            SGPA.module_title,
+            SGPA.grade,
+            SGPA.credits,
+            SGPA.is_gpa,
+            SemesterResult.sgpa,
+            SemesterResult.credits,
+            FinalResult.final_sgpa,
+            FinalResult.academic_standing
+        )
+        .select_from(User)
+        .outerjoin(SGPA, SGPA.user_id == User.id)
+        .outerjoin(SemesterResult, and_(
+            SemesterResult.user_id == User.id,
+            SemesterResult.semester == SGPA.semester
+        ))
+        .outerjoin(FinalResult, FinalResult.user_id == User.id)
+    )
+
+def user_data_query(reg_number):
+    """Select a user and all their module rows and results in one joined query"""
+    return (
+        _user_data_select()
+        .where(User.registration_number == reg_number)
+        .order_by(SGPA.id)
+    )
+
+def rows_to_user_data(rows):
+    """Build the get_user_data result from user_data_query column tuples"""
+    if not rows:
+        return None
+    name, registration_number, department, batch = rows[0][:4]
+    return {
+        "user": {
+            "name": name,
+            "registration_number": registration_number,
+            "department": department,
+            "batch": batch
+        },
+        "sgpa_records": [
+            {
+                "semester": row[4],
+                "module_code": row[5],
+                "module_title": row[6],
+                "grade": row[7],
+                "credits": row[8],
+                "is_gpa": row[9],
+                "semester_sgpa": row[10],
+                "semester_credits": row[11],
+                "final_sgpa": row[12],
+                "academic_standing": row[13]
+            }
+            for row in rows
+            if row[4] is not None
+        ]
+    }
+
 def get_user_data(reg_number):
     """
-    Retrieve user data and their SGPA records
+    Retrieve user data and their SGPA records with a single query.
+    Rows are read as plain column tuples, no ORM objects are built.
     """
     session = Session()
     try:
-        print(f"Searching for registration number: {reg_number}")  # Debug log
-        user = session.query(User).filter_by(registration_number=reg_number).first()
-        if user:
-            print(f"Found user: {user.name}")  # Debug log
-            sgpa_records = session.query(SGPA).filter_by(user_id=user.id).all()
-            print(f"Found {len(sgpa_records)} SGPA records")  # Debug log
-            return {
-                "user": {
-                    "name": user.name,
-                    "registration_number": user.registration_number,
-                    "department": user.department,
-                    "batch": user.batch
-                },
-                "sgpa_records": [
-                    {
-                        "semester": record.semester,
-                        "module_code": record.module_code,
-                        "module_title": record.module_title,
-                        "grade": record.grade,
-                        "credits": record.credits,
-                        "is_gpa": record.is_gpa,
-                        "semester_sgpa": record.semester_sgpa,
-                        "semester_credits": record.semester_credits,
-                        "final_sgpa": record.final_sgpa,
-                        "academic_standing": record.academic_standing
-                    }
-                    for record in sgpa_records
-                ]
-            }
-        print("No user found")  # Debug log
-        return None
-    except Exception as e:
-        print(f"Error retrieving data: {str(e)}")  # Debug log
+        user_data = rows_to_user_data(session.execute(user_data_query(reg_number)).all())
+        PERSISTENCE_OPERATIONS.labels("load", "found" if user_data else "missing").inc()
+        return user_data
+    except Exception:
+        PERSISTENCE_OPERATIONS.labels("load", "error").inc()
+        logger.exception("Error retrieving data")
         return None
     finally:
-        session.close() 
\ No newline at end of file
+        session.close()
+
+
+def iter_transcripts(batch=None, department=None, yield_per=1000):
+    """
+    Stream export transcripts (see app.export.transcript) for every student
+    in a batch and/or department. Rows are fetched `yield_per` at a time so
+    memory stays flat however many students match.
+    """
+    stmt = _user_data_select(User.id)
+    if batch:
+        stmt = stmt.where(User.batch == batch)
+    if department:
+        stmt = stmt.where(User.department == department)
+    stmt = stmt.order_by(User.id, SGPA.id).execution_options(yield_per=yield_per)
+
+    session = Session()
+    try:
+        rows = session.execute(stmt)
+        for _, user_rows in groupby(rows, key=lambda row: row[0]):
+            yield transcript_from_user_data(rows_to_user_data([row[1:] for row in user_rows]))
+    finally:
+        session.close()
+
+
+def set_transcript(transcript_id, semesters, scheme):
+    """
+    Grade a full transcript and store its per-semester results for later
+    one-semester updates. Transcripts untouched for TRANSCRIPT_STATE_TTL
+    seconds are removed on the way.
+    """
+    result = grade_transcript(semesters, scheme)
+    with WriteSession.begin() as session:
+        session.execute(delete(TranscriptState).where(
+            TranscriptState.updated_at < datetime.utcnow() - timedelta(seconds=TRANSCRIPT_STATE_TTL)
+        ))
+        stmt = dialect_insert(session, TranscriptState)
+        session.execute(stmt.on_conflict_do_update(
+            index_elements=["transcript_id"],
+            set_={col: stmt.excluded[col] for col in ["scheme", "semesters", "updated_at"]},
+        ), {
+            "transcript_id": transcript_id,
+            "scheme": scheme.key,
+            "semesters": result["semesters"],
+            "updated_at": datetime.utcnow(),
+        })
+    return result
+
+def update_transcript(transcript_id, semester):
+    """
+    Apply a one-semester change to a stored transcript, graded with the
+    scheme it was stored with. The row is read and rewritten in one write
+    transaction, so concurrent updates from several workers are not lost.
+    Returns None if the transcript (or its scheme) is unknown.
+    """
+    with WriteSession.begin() as session:
+        state = session.execute(
+            select(TranscriptState).where(TranscriptState.transcript_id == transcript_id).with_for_update()
+        ).scalar_one_or_none()
+        scheme = SCHEMES_BY_KEY.get(state.scheme) if state is not None else None
+        if scheme is None:
+            return None
+        result = update_results(state.semesters, semester, scheme)
+        state.semesters = result["semesters"]
+        state.updated_at = datetime.utcnow()
+    return result
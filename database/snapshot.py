@@ -0,0 +1,151 @@
+"""
+Columnar snapshot of the database for offline analysis.
+
+    python -m database.snapshot snapshots/latest
+
+Writes users.parquet (with final results), semester_results.parquet and a
+records/ dataset of module rows partitioned by batch and semester. grade
+and module_code are dictionary encoded. load_snapshot() opens a snapshot
+as memory-mapped Arrow data without touching SQLite.
+"""
+import argparse
+import os
+import shutil
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from pyarrow import fs
+from sqlalchemy import select
+from .models import engine, User, SGPA, SemesterResult, FinalResult
+
+RECORD_SCHEMA = pa.schema([
+    ("user_id", pa.int64()),
+    ("registration_number", pa.string()),
+    ("department", pa.dictionary(pa.int16(), pa.string())),
+    ("batch", pa.string()),
+    ("semester", pa.string()),
+    ("module_code", pa.dictionary(pa.int32(), pa.string())),
+    ("module_title", pa.dictionary(pa.int32(), pa.string())),
+    ("grade", pa.dictionary(pa.int8(), pa.string())),
+    ("credits", pa.float32()),
+    ("is_gpa", pa.bool_()),
+])
+# Explicit schemas so an empty database still gives typed, loadable files
+USER_SCHEMA = pa.schema([
+    ("user_id", pa.int64()),
+    ("registration_number", pa.string()),
+    ("name", pa.string()),
+    ("department", pa.string()),
+    ("batch", pa.string()),
+    ("final_sgpa", pa.float64()),
+    ("academic_standing", pa.string()),
+])
+SEMESTER_RESULT_SCHEMA = pa.schema([
+    ("user_id", pa.int64()),
+    ("semester", pa.string()),
+    ("sgpa", pa.float64()),
+    ("credits", pa.float64()),
+])
+PARTITIONING = ds.partitioning(
+    pa.schema([("batch", pa.string()), ("semester", pa.string())]), flavor="hive"
+)
+
+
+def _query_table(conn, stmt, schema):
+    result = conn.execute(stmt)
+    return pa.Table.from_pylist([dict(row._mapping) for row in result], schema=schema)
+
+
+def _record_batches(conn, chunksize):
+    stmt = (
+        select(
+            SGPA.user_id,
+            User.registration_number,
+            User.department,
+            User.batch,
+            SGPA.semester,
+            SGPA.module_code,
+            SGPA.module_title,
+            SGPA.grade,
+            SGPA.credits,
+            SGPA.is_gpa,
+        )
+        .join(User, User.id == SGPA.user_id)
+        .execution_options(yield_per=chunksize)
+    )
+    names = RECORD_SCHEMA.names
+    for rows in conn.execute(stmt).partitions():
+        columns = list(zip(*rows))
+        yield pa.RecordBatch.from_arrays(
+            [pa.array(col, type=RECORD_SCHEMA.field(name).type) for name, col in zip(names, columns)],
+            schema=RECORD_SCHEMA,
+        )
+
+
+def write_snapshot(path, chunksize=100_000):
+    """Export users, results and module rows to Parquet under `path`"""
+    os.makedirs(path, exist_ok=True)
+    with engine.connect() as conn:
+        users = _query_table(conn, select(
+            User.id.label("user_id"),
+            User.registration_number,
+            User.name,
+            User.department,
+            User.batch,
+            FinalResult.final_sgpa,
+            FinalResult.academic_standing,
+        ).outerjoin(FinalResult, FinalResult.user_id == User.id), USER_SCHEMA)
+        pq.write_table(users, os.path.join(path, "users.parquet"))
+
+        semester_results = _query_table(conn, select(
+            SemesterResult.user_id, SemesterResult.semester, SemesterResult.sgpa, SemesterResult.credits
+        ), SEMESTER_RESULT_SCHEMA)
+        pq.write_table(semester_results, os.path.join(path, "semester_results.parquet"))
+
+        # Replaced as a whole so partitions that no longer have rows do not
+        # linger; created even without rows so load_snapshot finds it
+        records = os.path.join(path, "records")
+        shutil.rmtree(records, ignore_errors=True)
+        os.makedirs(records)
+        ds.write_dataset(
+            _record_batches(conn, chunksize),
+            records,
+            schema=RECORD_SCHEMA,
+            format="parquet",
+            partitioning=PARTITIONING,
+            existing_data_behavior="delete_matching",
+        )
+    return path
+
+
+def load_snapshot(path):
+    """
+    Open a snapshot. Returns {"users", "semester_results", "records"}: the
+    first two as memory-mapped Arrow tables, records as a lazy dataset, e.g.
+    records.to_table(filter=ds.field("batch") == "Batch 20").
+    """
+    local = fs.LocalFileSystem(use_mmap=True)
+    return {
+        "users": pq.read_table(os.path.join(path, "users.parquet"), memory_map=True),
+        "semester_results": pq.read_table(os.path.join(path, "semester_results.parquet"), memory_map=True),
+        "records": ds.dataset(
+            os.path.join(path, "records"),
+            schema=RECORD_SCHEMA,
+            format="parquet",
+            partitioning=PARTITIONING,
+            filesystem=local,
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a Parquet snapshot of the database")
+    parser.add_argument("path")
+    parser.add_argument("--chunksize", type=int, default=100_000)
+    args = parser.parse_args()
+    write_snapshot(args.path, chunksize=args.chunksize)
+    print(f"Snapshot written to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+#!/bin/bash
+set -e
+
+# Add the current directory to PYTHONPATH
+export PYTHONPATH=$PYTHONPATH:$(pwd)
+
+# Create or upgrade the database before any worker starts
+python database/migrate.py
+
+# Start FastAPI with one worker per core (see gunicorn.conf.py)
+echo "Starting FastAPI (gunicorn)..."
+gunicorn app.main:app -c gunicorn.conf.py &
+
+# Start Streamlit (in foreground)
+echo "Starting Streamlit..."
+streamlit run app/frontend/streamlit_app.py --server.headless true
@@ -3,6 +3,9 @@
 # Add the current directory to PYTHONPATH
 export PYTHONPATH=$PYTHONPATH:$(pwd)
 
+# Create or upgrade the database
+python database/migrate.py || exit 1
+
 # Start FastAPI in the background
 echo "Starting FastAPI..."
 uvicorn app.main:app --reload &
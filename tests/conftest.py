@@ -0,0 +1,24 @@
+import os
+import random
+import sys
+import tempfile
+
+import pytest
+
+# Tests run against a throwaway database; set before database is imported
+_DB_DIR = tempfile.mkdtemp(prefix="sgpa-test-")
+os.environ.setdefault("SGPA_DATABASE_URL", f"sqlite:///{os.path.join(_DB_DIR, 'test.db')}")
+os.environ.setdefault("SGPA_EXPORT_DIR", os.path.join(_DB_DIR, "exports"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    from database.models import init_db
+
+    init_db()
+
+
+@pytest.fixture
+def rng():
+    return random.Random(42)
@@ -0,0 +1,93 @@
+import copy
+import io
+import time
+from datetime import timedelta
+
+import pandas as pd
+from sqlalchemy import select
+
+from benchmarks.synthetic import GRADES, make_student
+from database.history import CHECKPOINT_EVERY, list_versions, transcript_as_of
+from database.importer import import_file
+from database.models import User, TranscriptVersion
+from database.operations import Session, save_user_data, get_user_data
+
+
+def _modules(semesters):
+    return {
+        (sem["name"], m["code"]): (m["title"], m["grade"], m["credits"], m["is_gpa"])
+        for sem in semesters
+        for m in sem["modules"]
+    }
+
+
+def test_transcript_history_replay(rng):
+    student = make_student(rng, 30_000_000)
+    reg_number = student["registration_number"]
+    semesters = student["semesters"]
+    dropped = None
+    expected = {}
+    # Past a checkpoint boundary, with grade changes, removed and re-added modules and a rename
+    for version in range(1, CHECKPOINT_EVERY + 4):
+        module = semesters[version % len(semesters)]["modules"][0]
+        module["grade"] = GRADES[(GRADES.index(module["grade"]) + 1) % len(GRADES)]
+        if version % 4 == 0:
+            dropped = semesters[0]["modules"].pop()
+        elif dropped is not None:
+            semesters[0]["modules"].append(dropped)
+            dropped = None
+        if version == CHECKPOINT_EVERY:
+            student["name"] += " Jr"
+        assert save_user_data(student["name"], reg_number, student["department"], student["batch"], semesters)
+        expected[version] = (student["name"], copy.deepcopy(semesters))
+        time.sleep(0.002)
+
+    with Session() as session:
+        checkpoints = session.scalars(
+            select(TranscriptVersion.version)
+            .join(User, User.id == TranscriptVersion.user_id)
+            .where(User.registration_number == reg_number, TranscriptVersion.is_checkpoint)
+        ).all()
+        assert sorted(checkpoints) == [1, CHECKPOINT_EVERY + 1]
+
+        for version, (name, version_semesters) in expected.items():
+            transcript = transcript_as_of(session, reg_number, version=version)
+            assert transcript["user"]["name"] == name
+            assert _modules(transcript["semesters"]) == _modules(version_semesters)
+
+        # As of a time between two saves: the earlier of the two
+        for version in (CHECKPOINT_EVERY - 1, CHECKPOINT_EVERY + 2):
+            saved_at = transcript_as_of(session, reg_number, version=version)["created_at"]
+            transcript = transcript_as_of(session, reg_number, at=saved_at)
+            assert transcript["version"] == version
+            assert _modules(transcript["semesters"]) == _modules(expected[version][1])
+        first = transcript_as_of(session, reg_number, version=1)["created_at"]
+        assert transcript_as_of(session, reg_number, at=first - timedelta(seconds=1)) is None
+
+
+def test_import_records_version(rng):
+    student = make_student(rng, 30_000_001)
+    reg_number = student["registration_number"]
+    semesters = student["semesters"][:1]
+    module = semesters[0]["modules"][0]
+    module["grade"] = "F"
+    assert save_user_data(student["name"], reg_number, student["department"], student["batch"], semesters)
+
+    # A re-sit arrives through the importer
+    sheet = pd.DataFrame([{
+        "registration_number": reg_number, "name": student["name"], "department": student["department"],
+        "batch": student["batch"], "semester": semesters[0]["name"], "module_code": module["code"],
+        "module_title": module["title"], "grade": "B+", "credits": module["credits"],
+    }])
+    source = io.BytesIO(sheet.to_csv(index=False).encode())
+    assert import_file(source, fmt="csv")["imported"] == 1
+    module["grade"] = "B+"
+
+    with Session() as session:
+        versions = list_versions(session, reg_number)
+        assert len(versions) == 2
+        latest = transcript_as_of(session, reg_number)
+        assert latest["version"] == 2
+        assert _modules(latest["semesters"]) == _modules(semesters)
+        assert latest["results"]["final_sgpa"] == versions[1]["final_sgpa"]
+        assert versions[1]["final_sgpa"] == get_user_data(reg_number)["sgpa_records"][0]["final_sgpa"]
@@ -0,0 +1,76 @@
+"""
+Plans of the grade planner against exhaustive search on small inputs
+"""
+import itertools
+import random
+
+import pytest
+
+from app.grade.planner import plan_grades, _with_plan, MAX_REMAINING, MAX_CREDITS
+from app.grade.schemes import DEFAULT_SCHEME
+from app.grade.service import grade_transcript
+from benchmarks.synthetic import GRADES
+
+TARGETS = ["First Class", "Second Class - Upper Division"]
+
+
+def brute_force(semesters, remaining, target, min_grade):
+    """Lowest credit-weighted grade points of any plan reaching `target`, None if none does"""
+    points = DEFAULT_SCHEME.grade_point_map
+    threshold = DEFAULT_SCHEME.threshold(target)
+    choices = {p: g for g, p in points.items() if p >= points[min_grade]}
+    planned = [i for i, m in enumerate(remaining) if m["is_gpa"] and m["credits"] > 0]
+    best = None
+    for combo in itertools.product(choices, repeat=len(planned)):
+        cost = sum(p * remaining[i]["credits"] for p, i in zip(combo, planned))
+        if best is not None and cost >= best - 1e-9:
+            continue
+        grades = [min_grade] * len(remaining)
+        for p, i in zip(combo, planned):
+            grades[i] = choices[p]
+        if grade_transcript(_with_plan(semesters, remaining, grades))["final_sgpa"] >= threshold:
+            best = cost
+    return best
+
+
+def test_plan_matches_brute_force():
+    rng = random.Random(7)
+    for _ in range(100):
+        semesters = [
+            {"name": f"Semester {s + 1}", "modules": [
+                {"code": f"D{s}{m}", "title": "", "grade": rng.choice(GRADES),
+                 "credits": rng.choice([1, 1.5, 2, 3]), "is_gpa": True}
+                for m in range(3)
+            ]}
+            for s in range(rng.randint(0, 2))
+        ]
+        remaining = [
+            {"code": f"R{m}", "title": "", "credits": rng.choice([0.5, 1, 2, 3]),
+             "is_gpa": rng.random() > 0.1, "semester": rng.choice(["Semester 1", "Semester 3", "Semester 4"])}
+            for m in range(rng.randint(1, 4))
+        ]
+        target = rng.choice(TARGETS)
+        plan = plan_grades(semesters, remaining, target, "C")
+        best = brute_force(semesters, remaining, target, "C")
+
+        assert plan["achievable"] == (best is not None)
+        if best is not None:
+            assert plan["result"]["final_sgpa"] >= plan["threshold"]
+            cost = sum(
+                DEFAULT_SCHEME.grade_point_map[p["grade"]] * p["credits"]
+                for p, m in zip(plan["plan"], remaining) if m["is_gpa"]
+            )
+            assert cost == pytest.approx(best)
+
+
+def test_plan_rejects_oversized_input():
+    remaining = [
+        {"code": f"P{m:02d}", "title": "", "credits": 3, "is_gpa": True, "semester": "Semester 1"}
+        for m in range(MAX_REMAINING + 1)
+    ]
+    with pytest.raises(ValueError):
+        plan_grades([], remaining)
+    with pytest.raises(ValueError):
+        plan_grades([], [{"code": "P", "title": "", "credits": 2.25, "is_gpa": True, "semester": "Semester 1"}])
+    with pytest.raises(ValueError):
+        plan_grades([], [{"code": "P", "title": "", "credits": MAX_CREDITS + 1, "is_gpa": True, "semester": "Semester 1"}])